@@ -1,5 +1,20 @@
+# argparse, concurrent.futures, contextlib, hashlib, json, multiprocessing, platform,
+# queue, signal, subprocess and tracemalloc are imported by the functions that use
+# them, so importing this module stays cheap
 import heapq
+import itertools
+import math
+import mmap
+import operator
+import os
 import random
+import resource
+import struct
+import sys
+import time
+import zlib
+
+np = None  # NumPy is optional and slow to import; see _numpy_available
 
 def initialize_front_face_solved(cubix_tube):
     # Correcting the configuration for the solved state's front face
@@ -572,6 +587,9 @@ class CubixTube:
 
 
 class Piece:
+    # pieces are created for every slot of every decoded cube, so keep them small
+    __slots__ = ('color', 'orientation')
+
     def __init__(self, color, orientation):
         self.color = color
         self.orientation = orientation
@@ -595,15 +613,228 @@ class Piece:
         return f"{self.__class__.__name__}({color_emoji}, {self.orientation})"
 
 class CornerPiece(Piece):
-    def __init__(self, color, orientation):
-        super().__init__(color, orientation)
-        self.piece_type = "corner"
-        # No need for max_orientations if we're directly setting the orientation
+    __slots__ = ()
+    # shared by every instance instead of stored on each piece
+    piece_type = "corner"
+    # No need for max_orientations if we're directly setting the orientation
 
 class StraightPiece(Piece):
-    def __init__(self, color, orientation):
-        super().__init__(color, orientation)
-        self.piece_type = "straight"
+    __slots__ = ()
+    piece_type = "straight"
+
+
+# compact state encoding:
+# every slot gets a fixed-width code covering type, color and orientation.
+# 0-2 are the empty slot and the two centers, then one code per
+# (piece class, color, orientation).  Orientations run 1-12 for both piece
+# types since the solved front face carries a StraightPiece with orientation 9.
+# A state is the 27 slot codes as a bytes object, in the same x, y, z order
+# as serialize_cube_state.  pack_state squeezes it down to 7 bits per slot.
+PIECE_COLORS = ("Red", "Yellow", "Blue")
+NUM_ORIENTATIONS = 12
+
+EMPTY_CODE = 0
+CENTER_CODE = 1
+BLUE_CENTER_CODE = 2
+CORNER_CODE_BASE = 3
+STRAIGHT_CODE_BASE = CORNER_CODE_BASE + len(PIECE_COLORS) * NUM_ORIENTATIONS
+NUM_SLOT_CODES = STRAIGHT_CODE_BASE + len(PIECE_COLORS) * NUM_ORIENTATIONS
+
+NUM_SLOTS = 27
+SLOT_CODE_BITS = 7
+PACKED_STATE_SIZE = (NUM_SLOTS * SLOT_CODE_BITS + 7) // 8
+
+SLOT_CODE_PIECES = [None, "Center", "Blue Center"] + [
+    (piece_class, color, orientation)
+    for piece_class in (CornerPiece, StraightPiece)
+    for color in PIECE_COLORS
+    for orientation in range(1, NUM_ORIENTATIONS + 1)
+]
+
+
+def _slot_token(piece):
+    # same token serialize_cube_state writes for a slot
+    if isinstance(piece, tuple):
+        piece_class, color, orientation = piece
+        return f"{piece_class.__name__}-{color}-{orientation}"
+    return str(piece)
+
+
+_SLOT_CODES = {piece: code for code, piece in enumerate(SLOT_CODE_PIECES)}
+_SLOT_CODE_TOKENS = [_slot_token(piece) for piece in SLOT_CODE_PIECES]
+_SERIALIZED_SLOT_CODES = {token: code for code, token in enumerate(_SLOT_CODE_TOKENS)}
+
+
+def slot_index(x, y, z):
+    return 9 * x + 3 * y + z
+
+
+def encode_slot(piece):
+    if piece is None or isinstance(piece, str):
+        key = piece
+    else:
+        key = (type(piece), piece.color, piece.orientation)
+    code = _SLOT_CODES.get(key)
+    if code is None:
+        raise ValueError(f"Cannot encode slot contents: {piece!r}")
+    return code
+
+
+def decode_slot(code):
+    piece = SLOT_CODE_PIECES[code]
+    if isinstance(piece, tuple):
+        piece_class, color, orientation = piece
+        return piece_class(color, orientation)
+    return piece
+
+
+def encode_cube_state(cube):
+    """
+    Encode a nested cube list into the compact 27 byte state used as a search key.
+    """
+    return bytes([encode_slot(piece) for layer in cube for row in layer for piece in row])
+
+
+def decode_cube_state(state):
+    """
+    Decode a compact state back into a nested cube list with fresh piece objects.
+    """
+    return [[[decode_slot(state[9 * x + 3 * y + z]) for z in range(3)] for y in range(3)] for x in range(3)]
+
+
+def decode_to_cubix_tube(state):
+    new_cube = CubixTube()
+    new_cube.cube = decode_cube_state(state)
+    return new_cube
+
+
+def encode_serialized_state(serialized_state):
+    """
+    Encode a serialize_cube_state string directly, without building piece objects.
+    """
+    try:
+        return bytes([_SERIALIZED_SLOT_CODES[token] for token in serialized_state.split('|')])
+    except KeyError as error:
+        raise ValueError(f"Cannot encode serialized slot: {error.args[0]}") from None
+
+
+def serialize_encoded_state(state):
+    return '|'.join([_SLOT_CODE_TOKENS[code] for code in state])
+
+
+def pack_state(state):
+    """
+    Pack a compact state into PACKED_STATE_SIZE bytes (7 bits per slot), for on-disk storage.
+    """
+    packed = 0
+    for code in reversed(state):
+        packed = (packed << SLOT_CODE_BITS) | code
+    return packed.to_bytes(PACKED_STATE_SIZE, 'little')
+
+
+def unpack_state(packed_state):
+    packed = int.from_bytes(packed_state, 'little')
+    mask = (1 << SLOT_CODE_BITS) - 1
+    return bytes([(packed >> (SLOT_CODE_BITS * i)) & mask for i in range(NUM_SLOTS)])
+
+
+class FrozenPiece:
+    """
+    Read-only piece for a single slot code. There is exactly one instance per code
+    (see FROZEN_PIECES), so CubeState hands these out without allocating.
+    """
+    __slots__ = ('code', 'piece_class', 'color', 'orientation')
+
+    def __init__(self, code):
+        piece_class, color, orientation = SLOT_CODE_PIECES[code]
+        object.__setattr__(self, 'code', code)
+        object.__setattr__(self, 'piece_class', piece_class)
+        object.__setattr__(self, 'color', color)
+        object.__setattr__(self, 'orientation', orientation)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenPiece is immutable")
+
+    def __repr__(self):
+        return f"{self.color}-{self.orientation}"
+
+    @property
+    def piece_type(self):
+        return self.piece_class.piece_type
+
+    def representation(self):
+        return Piece.representation(self.thaw())
+
+    def thaw(self):
+        return self.piece_class(self.color, self.orientation)
+
+
+FROZEN_PIECES = [
+    FrozenPiece(code) if isinstance(piece, tuple) else piece
+    for code, piece in enumerate(SLOT_CODE_PIECES)
+]
+
+
+class CubeState(bytes):
+    """
+    Immutable cube state with value semantics.
+
+    A CubeState is the compact encoded state itself (a bytes subclass), so it
+    hashes and compares equal to the plain encoded key and can be used directly
+    in the search dictionaries.  Pieces are handed out as interned FrozenPieces.
+    """
+    __slots__ = ()
+
+    def __new__(cls, state):
+        if len(state) != NUM_SLOTS or max(state) >= NUM_SLOT_CODES:
+            raise ValueError(f"Not an encoded cube state: {state!r}")
+        return super().__new__(cls, state)
+
+    @classmethod
+    def from_cube(cls, cube):
+        return super().__new__(cls, encode_cube_state(cube))
+
+    @classmethod
+    def from_cubix_tube(cls, cubix_tube):
+        return cls.from_cube(cubix_tube.cube)
+
+    @classmethod
+    def from_serialized(cls, serialized_state):
+        return super().__new__(cls, encode_serialized_state(serialized_state))
+
+    def __repr__(self):
+        return f"CubeState({bytes(self)!r})"
+
+    def apply(self, move):
+        """
+        Return the state after a move, given by name or as a CompiledMove.
+        """
+        if isinstance(move, str):
+            move = move_tables()[move]
+        return bytes.__new__(CubeState, move.apply(self))
+
+    def apply_moves(self, moves):
+        tables = move_tables()
+        state = bytes(self)
+        for move in moves:
+            state = (tables[move] if isinstance(move, str) else move).apply(state)
+        return bytes.__new__(CubeState, state)
+
+    def piece(self, x, y, z):
+        return FROZEN_PIECES[self[slot_index(x, y, z)]]
+
+    def pieces(self):
+        return [FROZEN_PIECES[code] for code in self]
+
+    def to_cube(self):
+        return decode_cube_state(self)
+
+    def to_cubix_tube(self):
+        return decode_to_cubix_tube(self)
+
+    def serialize(self):
+        return serialize_encoded_state(self)
+
 
 # code to serialize the cube state
 def serialize_cube_state(cube):
@@ -755,11 +986,12 @@ def calculate_heuristic(cube_state, solved_state):
 
 
 
-def apply_random_moves(cube, num_moves):
+def apply_random_moves(cube, num_moves, moves=None, rng=random):
+    # moves defaults to every move in move_pairs; pass a random.Random as rng to make it reproducible
     serialized_states = []
     applied_moves = []
     for _ in range(num_moves):
-        move = random.choice(list(move_pairs.keys()))
+        move = rng.choice(list(move_pairs.keys()) if moves is None else moves)
         getattr(cube, move)()
         applied_moves.append(move)
         serialized_states.append(serialize_cube_state(cube.cube))
@@ -773,149 +1005,964 @@ def revert_random_moves(cube, applied_moves):
         getattr(cube, reverse_move)()
 
 
-def a_star_search(start_cube, goal_state_serialized, goal_cubix_tube):
+class SearchMonitor:
+    """
+    Progress and metrics hook for the A* drivers.  It only counts by default; give it
+    verbose=True to print a line per sample, or trace_path to append every sample as a
+    JSON line for offline analysis.  Samples are taken every interval seconds.
+    """
+
+    def __init__(self, interval=1.0, trace_path=None, verbose=False):
+        self.interval = interval
+        self.trace_path = trace_path
+        self.verbose = verbose
+        self.search_name = None
+        self.trace_file = None
+        self.start_time = None
+        self.next_sample = None
+        self.expansions = 0
+        self.open_size = 0
+        self.closed_size = 0
+        self.f = None
+        self.best_f = None  # lowest f of any generated state, like the old min_heuristic
+        self.depth = 0
+        self.max_depth = 0
+        self.heuristic_histogram = {}  # heuristic value -> number of generated states
+
+    def start(self, search_name):
+        self.search_name = search_name
+        self.start_time = time.perf_counter()
+        if self.interval is not None:
+            self.next_sample = self.start_time + self.interval
+        if self.trace_path is not None:
+            self.trace_file = open(self.trace_path, "a")
+
+    def expanded(self, f, g, open_size, closed_size):
+        self.expansions += 1
+        self.open_size = open_size
+        self.closed_size = closed_size
+        self.depth = g
+        if g > self.max_depth:
+            self.max_depth = g
+        self.f = f
+        # reading the clock on every expansion would cost more than the check saves
+        if self.next_sample is not None and not self.expansions & 255 and time.perf_counter() >= self.next_sample:
+            self.sample("sample")
+            self.next_sample = time.perf_counter() + self.interval
+
+    def generated(self, f, h):
+        self.heuristic_histogram[h] = self.heuristic_histogram.get(h, 0) + 1
+        if self.best_f is None or f < self.best_f:
+            self.best_f = f
+
+    def finish(self, path):
+        self.sample("finish", solved=path is not None, path_length=None if path is None else len(path))
+        if self.trace_file is not None:
+            self.trace_file.close()
+            self.trace_file = None
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.start_time
+        return {
+            "search": self.search_name,
+            "elapsed": elapsed,
+            "expansions": self.expansions,
+            "expansions_per_second": self.expansions / elapsed if elapsed > 0 else 0.0,
+            "open_size": self.open_size,
+            "closed_size": self.closed_size,
+            "f": self.f,
+            "best_f": self.best_f,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "heuristic_histogram": {str(h): count for h, count in sorted(self.heuristic_histogram.items())},
+        }
+
+    def sample(self, event, **extra):
+        record = {"event": event, **self.snapshot(), **extra}
+        if self.trace_file is not None:
+            import json
+            self.trace_file.write(json.dumps(record) + "\n")
+            self.trace_file.flush()
+        if self.verbose:
+            print(f"{self.search_name}: {record['expansions']} expanded ({record['expansions_per_second']:.0f}/s), "
+                  f"open {record['open_size']}, closed {record['closed_size']}, f {record['f']}, best f {record['best_f']}, depth {record['depth']}")
+        return record
+
+
+def a_star_core(start_state, goal_state, moves, heuristic, monitor=None, search_name="a_star", symmetries=None,
+                checkpoint_path=None, checkpoint_interval=300.0, resume=None, is_goal=None, weight=1):
+    """
+    The A* loop shared by a_star_search and a_star_search_alpha, on compact states.
+
+    Args:
+        start_state: The encoded start state.
+        goal_state: The encoded goal state.
+        moves: Names of the moves to expand with.
+        heuristic: A heuristic with score(state); incremental heuristics are rescored per move.
+        monitor: Optional SearchMonitor; a silent one is used if None.
+        search_name: Name reported by the monitor.
+        symmetries: Optional symmetries from goal_symmetries.  States are then stored under
+            canonical_state, one entry per class, while the heap keeps the actual states.
+        checkpoint_path: If given, the search is snapshotted there every checkpoint_interval
+            seconds by a forked child, for resume_a_star_search.
+        checkpoint_interval: Seconds between checkpoints.
+        resume: (open_set, g_score, came_from, closed_set) to continue from, as read by read_checkpoint.
+        is_goal: Optional goal predicate on states, for goals that only fix some slots;
+            defaults to equality with goal_state.
+        weight: States are ordered by f = g + weight * h.  With an admissible heuristic the
+            path is at most weight times longer than the shortest one.
+
+    Returns:
+        A list of moves from the start state to the goal state, or None.  A fresh search
+        for the whole goal returns None at once if solvability_check rejects the start state.
+    """
+    if symmetries and any(symmetry.apply(goal_state) != goal_state for symmetry in symmetries):
+        raise ValueError("Symmetries must leave the goal state unchanged.")
+    if monitor is None:
+        monitor = SearchMonitor(interval=None)
+    monitor.start(search_name)
+    if resume is None and is_goal is None and not solvability_check(goal_state, moves).is_solvable(start_state):
+        monitor.finish(None)
+        return None
+    compiled_moves = [move_tables()[move_name] for move_name in moves]
+
+    if resume is not None:
+        open_set, g_score, came_from, closed_set = resume
+    else:
+        start_key = canonical_state(start_state, symmetries) if symmetries else start_state
+        open_set = [(0, 0, start_state)]
+        g_score = {start_key: 0}
+        came_from = {}  # Track the path: state key -> (parent key, move that led here)
+        closed_set = set()  # Track visited states
+
+    checkpoint = None
+    if checkpoint_path is not None:
+        checkpoint = {"pid": None, "due": time.perf_counter() + checkpoint_interval, "expansions": 0}
+
+        def write():
+            write_checkpoint(checkpoint_path, search_name, moves, symmetries, start_state, goal_state,
+                             open_set, g_score, came_from, closed_set, weight)
+
+    try:
+        return _a_star_loop(goal_state, is_goal, compiled_moves, heuristic, monitor, symmetries, weight,
+                            open_set, g_score, came_from, closed_set,
+                            checkpoint, checkpoint_interval, write if checkpoint else None)
+    finally:
+        if checkpoint is not None and checkpoint["pid"] is not None:
+            os.waitpid(checkpoint["pid"], 0)
+
+
+def _a_star_loop(goal_state, is_goal, compiled_moves, heuristic, monitor, symmetries, weight,
+                 open_set, g_score, came_from, closed_set, checkpoint, checkpoint_interval, write):
+    while open_set:
+        if checkpoint is not None:
+            checkpoint["expansions"] += 1
+            if not checkpoint["expansions"] & 255 and time.perf_counter() >= checkpoint["due"]:
+                checkpoint["pid"] = fork_checkpoint(checkpoint["pid"], write)
+                checkpoint["due"] = time.perf_counter() + checkpoint_interval
+
+        current_f, current_g, current_state = heapq.heappop(open_set)
+        current_key = canonical_state(current_state, symmetries) if symmetries else current_state
+
+        # Goal check
+        if current_state == goal_state if is_goal is None else is_goal(current_state):
+            path = reconstruct_path(came_from, current_key)
+            monitor.finish(path)
+            return path
+
+        # a state can sit in the heap more than once; only its first pop is expanded, and
+        # only from the entry that came_from describes
+        if current_key in closed_set or current_g > g_score[current_key]:
+            continue
+        closed_set.add(current_key)
+        monitor.expanded(current_f, current_g, len(open_set), len(closed_set))
+        if heuristic.incremental:
+            contributions = heuristic.contributions(current_state)
+            current_h = sum(contributions)
+
+        # Explore each move from the current state, straight from the compact state
+        for move in compiled_moves:
+            new_state = move.apply(current_state)
+            new_key = canonical_state(new_state, symmetries) if symmetries else new_state
+
+            if new_key in closed_set:
+                continue  # Skip already visited states
+
+            tentative_g_score = current_g + 1  # Cost of each move is 1
+
+            # Update path and score if a better path is found
+            if new_key not in g_score or tentative_g_score < g_score[new_key]:
+                came_from[new_key] = (current_key, move.name)
+                g_score[new_key] = tentative_g_score
+                if heuristic.incremental:
+                    h = heuristic.rescore(current_h, contributions, move, new_state)
+                else:
+                    h = heuristic.score(new_state)
+                f_score = tentative_g_score + (h if weight == 1 else weight * h)
+                monitor.generated(f_score, h)
+                heapq.heappush(open_set, (f_score, tentative_g_score, new_state))
+
+    monitor.finish(None)
+    return None  # Return None if no path to goal state is found
+
+
+def a_star_search(start_cube, goal_state_serialized, goal_cubix_tube, heuristic=None, monitor=None, symmetries=None,
+                  checkpoint_path=None, checkpoint_interval=300.0, weight=1):
     """
     Perform A* search to find the shortest path to solve the Rubik's cube.
 
     Args:
         start_cube: An instance of CubixTube representing the starting state.
         goal_state_serialized: A serialized string representing the goal state.
+        heuristic: Optional heuristic with a score(state) method, e.g. a
+            PatternDatabaseHeuristic.  Defaults to calculate_heuristic.
+        monitor: Optional SearchMonitor for progress and metrics; the search is silent without one.
+        symmetries: Optional goal_symmetries for the moves, to store one state per class.
+        checkpoint_path: Optional file to snapshot the search to; see resume_a_star_search.
+        checkpoint_interval: Seconds between checkpoints.
+        weight: Weighted A*: f = g + weight * h.  Values above 1 find a path sooner, at
+            most weight times longer than the shortest when the heuristic is admissible.
 
     Returns:
         A list of moves representing the path from the start state to the goal state.
     """
-    # Initialize the priority queue with the start state
-    open_set = [(0, 0, serialize_cube_state(start_cube.cube))]
-    heapq.heapify(open_set)
-    min_heuristic = 50
-    
-    # Initialize score tracking
-    g_score = {serialize_cube_state(start_cube.cube): 0}
-    came_from = {}  # Track the path
-    closed_set = set()  # Track visited states
+    # states are keyed by their compact encoding rather than the serialized string
+    start_state = encode_cube_state(start_cube.cube)
+    goal_state = encode_serialized_state(goal_state_serialized)
+    moves = SLICE_MOVES
+    if heuristic is None:
+        heuristic = slot_heuristic(encode_cube_state(goal_cubix_tube.cube), calculate_heuristic)
+    return a_star_core(start_state, goal_state, moves, heuristic, monitor, "a_star_search", symmetries,
+                       checkpoint_path, checkpoint_interval, weight=weight)
 
-    # Define available moves
-    moves = ['L', 'R', 'F', 'B', 'U', 'D', 'M_RL', 'M_FB', 'M_UD']
 
-    while open_set:
-        _, current_g, current_serialized = heapq.heappop(open_set)
+def a_star_search_alpha(start_cube, goal_state_serialized, goal_cubix_tube, heuristic=None, monitor=None, symmetries=None,
+                        checkpoint_path=None, checkpoint_interval=300.0, weight=1):
 
-        # Goal check
-        if current_serialized == goal_state_serialized:
-            return reconstruct_path(came_from, current_serialized)
+    """
+    Perform A* search to find the shortest path to solve the Rubik's cube.
+
+    Args:
+        start_cube: An instance of CubixTube representing the starting state.
+        goal_state_serialized: A serialized string representing the goal state.
+        heuristic: Optional heuristic with a score(state) method, e.g. a
+            PatternDatabaseHeuristic.  Defaults to calculate_heuristic_alpha.
+        monitor: Optional SearchMonitor for progress and metrics; the search is silent without one.
+        symmetries: Optional goal_symmetries for the moves, to store one state per class.
+        checkpoint_path: Optional file to snapshot the search to; see resume_a_star_search.
+        checkpoint_interval: Seconds between checkpoints.
+        weight: Weighted A*: f = g + weight * h.  Values above 1 find a path sooner, at
+            most weight times longer than the shortest when the heuristic is admissible.
 
-        closed_set.add(current_serialized)
+    Returns:
+        A list of moves representing the path from the start state to the goal state.
+    """
+    start_state = encode_cube_state(start_cube.cube)
+    goal_state = encode_serialized_state(goal_state_serialized)
+    moves = FACE_MOVES
+    if heuristic is None:
+        heuristic = slot_heuristic(encode_cube_state(goal_cubix_tube.cube), calculate_heuristic_alpha, orientation_matrix)
+    return a_star_core(start_state, goal_state, moves, heuristic, monitor, "a_star_search_alpha", symmetries,
+                       checkpoint_path, checkpoint_interval, weight=weight)
+
+
+# checkpoints:
+# A checkpoint holds the whole A* search: the open heap in heap order, g scores,
+# came_from links and the closed set, as fixed size binary records, after a small JSON
+# block with the search name, moves, symmetries and the random module's state.  It is
+# written by a forked child from its copy-on-write snapshot, so the search goes on
+# while it is written, and renamed into place so a crash never leaves half a file.
+CHECKPOINT_MAGIC = b'CUBIXCKP'
+CHECKPOINT_VERSION = 1
+CHECKPOINT_HEADER = struct.Struct('<8sBI27s27sQQQQ')
+CHECKPOINT_OPEN = struct.Struct('<dI27s')
+CHECKPOINT_G_SCORE = struct.Struct('<27sI')
+CHECKPOINT_LINK = struct.Struct('<27s27sB')
+CHECKPOINT_CLOSED = struct.Struct('<27s')
+CHECKPOINT_READ_RECORDS = 1 << 16
+
+
+def write_checkpoint(path, search_name, moves, symmetries, start_state, goal_state, open_set, g_score, came_from, closed_set,
+                     weight=1):
+    import json
+
+    metadata = json.dumps({
+        "search_name": search_name,
+        "moves": list(moves),
+        "symmetries": None if symmetries is None else [symmetry.name for symmetry in symmetries],
+        "weight": weight,
+        "random_state": random.getstate(),
+    }).encode()
+    move_index = {move_name: index for index, move_name in enumerate(moves)}
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as checkpoint_file:
+        checkpoint_file.write(CHECKPOINT_HEADER.pack(
+            CHECKPOINT_MAGIC, CHECKPOINT_VERSION, len(metadata), start_state, goal_state,
+            len(open_set), len(g_score), len(came_from), len(closed_set),
+        ))
+        checkpoint_file.write(metadata)
+        for f_score, g, state in open_set:
+            checkpoint_file.write(CHECKPOINT_OPEN.pack(f_score, g, state))
+        for state, g in g_score.items():
+            checkpoint_file.write(CHECKPOINT_G_SCORE.pack(state, g))
+        for state, (parent, move_name) in came_from.items():
+            checkpoint_file.write(CHECKPOINT_LINK.pack(state, parent, move_index[move_name]))
+        for state in closed_set:
+            checkpoint_file.write(state)
+    os.replace(temporary_path, path)
+
+
+def _read_checkpoint_records(checkpoint_file, record, count):
+    # yields count records, reading CHECKPOINT_READ_RECORDS of them per call
+    while count:
+        block = min(count, CHECKPOINT_READ_RECORDS)
+        data = checkpoint_file.read(block * record.size)
+        if len(data) != block * record.size:
+            raise ValueError(f"{checkpoint_file.name} is truncated.")
+        yield from record.iter_unpack(data)
+        count -= block
+
+
+def read_checkpoint(path):
+    """
+    Read a checkpoint written by write_checkpoint.
 
-        # Temporarily deserialize the cube for move exploration
-        temp_cube = simplified_to_cubix_tube(current_serialized)
+    Returns:
+        A dict with search_name, moves, symmetries, weight, random_state, start_state, goal_state
+        and resume, the (open_set, g_score, came_from, closed_set) tuple for a_star_core.
+    """
+    import json
+
+    # the records are streamed a block at a time, so the file is never held in memory
+    # next to the structures rebuilt from it
+    with open(path, "rb") as checkpoint_file:
+        header = checkpoint_file.read(CHECKPOINT_HEADER.size)
+        if len(header) < CHECKPOINT_HEADER.size:
+            raise ValueError(f"{path} is not a version {CHECKPOINT_VERSION} checkpoint.")
+        magic, version, metadata_size, start_state, goal_state, num_open, num_g_score, num_links, num_closed = \
+            CHECKPOINT_HEADER.unpack(header)
+        if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+            raise ValueError(f"{path} is not a version {CHECKPOINT_VERSION} checkpoint.")
+        checkpoint = json.loads(checkpoint_file.read(metadata_size))
+
+        open_set = [
+            (f_score if not f_score.is_integer() else int(f_score), g, state)
+            for f_score, g, state in _read_checkpoint_records(checkpoint_file, CHECKPOINT_OPEN, num_open)
+        ]
+        g_score = dict(_read_checkpoint_records(checkpoint_file, CHECKPOINT_G_SCORE, num_g_score))
+        moves = checkpoint["moves"]
+        came_from = {
+            state: (parent, moves[move])
+            for state, parent, move in _read_checkpoint_records(checkpoint_file, CHECKPOINT_LINK, num_links)
+        }
+        closed_set = {state for (state,) in _read_checkpoint_records(checkpoint_file, CHECKPOINT_CLOSED, num_closed)}
 
-        print(f"Deserialized cube: {serialize_cube_state(temp_cube.cube)}")
+    checkpoint.update(start_state=start_state, goal_state=goal_state, resume=(open_set, g_score, came_from, closed_set))
+    return checkpoint
 
 
-        # Explore each move from the current state
-        
-        for move_name in moves:
-            new_serialized = apply_move(temp_cube, move_name)
+def fork_checkpoint(previous_pid, write):
+    """
+    Run write() in a forked child and return its pid.  If the previous child is still
+    writing, this checkpoint is skipped rather than waited for.
+    """
+    if previous_pid is not None:
+        finished_pid, _ = os.waitpid(previous_pid, os.WNOHANG)
+        if finished_pid == 0:
+            return previous_pid
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 1
+        try:
+            write()
+            exit_code = 0
+        finally:
+            os._exit(exit_code)
+    return pid
+
+
+def resume_a_star_search(checkpoint_path, heuristic=None, monitor=None, checkpoint_interval=300.0):
+    """
+    Continue an a_star_search or a_star_search_alpha run from its checkpoint, exactly where it
+    stopped, and keep checkpointing to the same file.
 
-            if new_serialized in closed_set:
-                print("found duplicate in set")
-                continue  # Skip already visited states
+    Args:
+        checkpoint_path: The checkpoint file the search was writing.
+        heuristic: The heuristic the search was using; defaults to that search's default.
+        monitor: Optional SearchMonitor for progress and metrics.
+        checkpoint_interval: Seconds between further checkpoints.
 
-            tentative_g_score = current_g + 1
+    Returns:
+        A list of moves from the start state to the goal state, or None.
+    """
+    checkpoint = read_checkpoint(checkpoint_path)
+    random_state = checkpoint["random_state"]
+    random.setstate((random_state[0], tuple(random_state[1]), random_state[2]))
+    goal_state = checkpoint["goal_state"]
+    if heuristic is None:
+        if checkpoint["search_name"] == "a_star_search_alpha":
+            heuristic = slot_heuristic(goal_state, calculate_heuristic_alpha, orientation_matrix)
+        else:
+            heuristic = slot_heuristic(goal_state, calculate_heuristic)
+    symmetries = None
+    if checkpoint["symmetries"] is not None:
+        by_name = {symmetry.name: symmetry for symmetry in puzzle_symmetries(checkpoint["moves"])}
+        symmetries = [by_name[name] for name in checkpoint["symmetries"]]
+    return a_star_core(checkpoint["start_state"], goal_state, checkpoint["moves"], heuristic, monitor,
+                       checkpoint["search_name"], symmetries, checkpoint_path, checkpoint_interval, checkpoint["resume"],
+                       weight=checkpoint["weight"])
+
+
+# staged solving:
+# The red layer is solved first, then the yellow middle with the red layer kept,
+# then the blue layer, which completes the cube.  Each phase is its own A* search
+# with a goal predicate over the slots solved so far, starting where the previous
+# phase ended; the move lists are concatenated and simplified where they meet.
+class SolverPhase:
+    def __init__(self, name, slots, heuristic, moves=None):
+        """
+        Args:
+            name: Name reported for the phase.
+            slots: Slots that must match the goal when the phase ends.
+            heuristic: Heuristic with a score(state) method guiding the phase.
+            moves: Move names the phase may use; defaults to FACE_MOVES.
+        """
+        self.name = name
+        self.slots = tuple(slots)
+        self.heuristic = heuristic
+        self.moves = moves
 
-            # Update path and score if a better path is found
-            if new_serialized not in g_score or tentative_g_score < g_score[new_serialized]:
-
-                new_cubix_tube = simplified_to_cubix_tube(new_serialized)
-                came_from[new_serialized] = current_serialized
-                g_score[new_serialized] = tentative_g_score
-                f_score = tentative_g_score + calculate_heuristic(new_cubix_tube.cube, goal_cubix_tube.cube)
-
-                if f_score < min_heuristic:
-                    min_heuristic = f_score
-                    new_cubix_tube.print_cube_slices()
-                    goal_cubix_tube.print_cube_slices()
-                    print(min_heuristic)
-               
-                heapq.heappush(open_set, (f_score, tentative_g_score, new_serialized))
-                
+    def goal_test(self, goal_state):
+        goal_codes = slot_getter(self.slots)(goal_state)
+        codes = slot_getter(self.slots)
+        return lambda state: codes(state) == goal_codes
 
-        print("Min Heuristic: ", min_heuristic, "Closed Set Size: ", len(closed_set))
-        print(reconstruct_path(came_from, current_serialized))
 
+def layer_slots(x):
+    return [slot_index(x, y, z) for y in range(3) for z in range(3)]
 
-    return None  # Return None if no path to goal state is found
+
+def red_pattern_databases(goal_state, moves):
+    """
+    Pattern databases for just the red pieces, in the corner slots and in the edge slots.
+    Every red piece sits in the red layer when it is solved, so both are admissible for that phase.
+    """
+    piece_kinds = [(piece_class, color) for piece_class in (CornerPiece, StraightPiece) for color in PIECE_COLORS]
+    red_track = {kind: "orientation" for kind in piece_kinds if kind[1] == "Red"}
+    return [
+        PatternDatabase("red_corners", goal_state, moves, CORNER_SLOTS, red_track),
+        PatternDatabase("red_edges", goal_state, moves, EDGE_SLOTS, red_track),
+    ]
 
 
-def a_star_search_alpha(start_cube, goal_state_serialized, goal_cubix_tube):
+def staged_phases(goal_state, pattern_database_directory=None):
+    """
+    The red, yellow and blue phases for goal_state.
 
+    The red phase is guided by red_pattern_databases, kept in pattern_database_directory or
+    built in memory; calculate_heuristic_alpha scores a single misplaced red piece at 19,
+    which sends A* deep down the wrong branches.  The later phases use calculate_heuristic
+    over the slots solved so far.
     """
-    Perform A* search to find the shortest path to solve the Rubik's cube.
+    red_heuristic = open_pattern_databases(red_pattern_databases(goal_state, FACE_MOVES), pattern_database_directory)
+    full = slot_heuristic(goal_state, calculate_heuristic)
+
+    def restricted(slots):
+        return SlotHeuristic([table if slot in slots else bytes(NUM_SLOT_CODES) for slot, table in enumerate(full.tables)])
+
+    red = layer_slots(2)
+    yellow = red + layer_slots(1)
+    blue = yellow + layer_slots(0)
+    return [
+        SolverPhase("red", red, red_heuristic),
+        SolverPhase("yellow", yellow, restricted(yellow)),
+        SolverPhase("blue", blue, restricted(blue)),
+    ]
+
+
+def simplify_moves(moves):
+    """
+    Shorten a move list by merging turns of the same face, looking past turns of faces that
+    commute with it: L R L_Prime becomes R, and F F becomes F2.  Two turns that cancel are dropped.
+    """
+    tables = move_tables()
+    by_signature = {_transform_signature(move.apply): name for name, move in tables.items()}
+    identity = _transform_signature(lambda state: state)
+    simplified = []
+    for move_name in moves:
+        touched = set(tables[move_name].touched)
+        # look back past moves on disjoint slots, which commute with this one
+        position = len(simplified) - 1
+        while position >= 0 and touched.isdisjoint(tables[simplified[position]].touched):
+            position -= 1
+        if position >= 0 and set(tables[simplified[position]].touched) == touched:
+            earlier = tables[simplified[position]]
+            signature = _transform_signature(lambda state: tables[move_name].apply(earlier.apply(state)))
+            if signature == identity:
+                del simplified[position]
+                continue
+            if signature in by_signature:
+                simplified[position] = by_signature[signature]
+                continue
+        simplified.append(move_name)
+    return simplified
+
+
+def staged_solve(start_cube, goal_cubix_tube, phases=None, monitor=None):
+    """
+    Solve phase by phase, each phase starting from where the previous one ended.
 
     Args:
         start_cube: An instance of CubixTube representing the starting state.
-        goal_state_serialized: A serialized string representing the goal state.
+        goal_cubix_tube: The goal as a CubixTube.
+        phases: SolverPhase list; defaults to staged_phases for the goal.
+        monitor: Optional SearchMonitor, used for every phase.
 
     Returns:
-        A list of moves representing the path from the start state to the goal state.
+        A tuple of (the simplified list of moves, or None if a phase fails, and a list of
+        dicts with each phase's name, moves and seconds).
+    """
+    goal_state = encode_cube_state(goal_cubix_tube.cube)
+    if phases is None:
+        phases = staged_phases(goal_state)
+    state = encode_cube_state(start_cube.cube)
+    moves = []
+    report = []
+    for phase in phases:
+        started = time.perf_counter()
+        path = a_star_core(state, goal_state, phase.moves or FACE_MOVES, phase.heuristic, monitor,
+                           f"staged_solve:{phase.name}", is_goal=phase.goal_test(goal_state))
+        report.append({"phase": phase.name, "moves": path, "seconds": time.perf_counter() - started})
+        if path is None:
+            return None, report
+        for move_name in path:
+            state = move_tables()[move_name].apply(state)
+        moves.extend(path)
+    return simplify_moves(moves), report
+
+
+def ara_star_search(start_cube, goal_state_serialized, goal_cubix_tube, moves=None, heuristic=None,
+                    initial_weight=3.0, weight_step=0.5, time_budget=None):
     """
-    # Initialize the priority queue with the start state
-    print("Starting Phase Alpha...")
-    open_set = [(0, 0, serialize_cube_state(start_cube.cube))]
-    heapq.heapify(open_set)
-    min_heuristic = 100
+    Anytime repairing A* (ARA*): a weighted A* search that finds a first path quickly, then
+    lowers the weight and repairs the search, reusing everything expanded so far, to find
+    shorter paths until the weight reaches 1 or the time budget runs out.
 
-    # Initialize score tracking
-    g_score = {serialize_cube_state(start_cube.cube): 0}
-    came_from = {}  # Track the path
-    closed_set = set()  # Track visited states
+    States whose g improves after they were expanded are kept aside as inconsistent and
+    put back into the open set for the next, lower weight.
 
-    # Define available moves
-    moves = ['L', 'L_Prime', 'R', 'R_Prime', 'F', 'F_Prime', 'B', 'B_Prime', 'U', 'U_Prime', 'D', 'D_Prime', 'L2', 'R2', 'F2', 'B2', 'U2', 'D2']
+    Args:
+        start_cube: An instance of CubixTube representing the starting state.
+        goal_state_serialized: A serialized string representing the goal state.
+        goal_cubix_tube: The goal as a CubixTube, used for the default heuristic.
+        moves: Move names to search with; defaults to FACE_MOVES.
+        heuristic: Optional heuristic with a score(state) method.  Defaults to the red layer
+            pattern databases, which are admissible, so the bounds hold.
+        initial_weight: Weight of the first search.
+        weight_step: How much the weight drops after each search.
+        time_budget: Seconds to keep improving for, or None to run down to weight 1.
+
+    Yields:
+        (path, bound) each time a shorter path is found or its bound tightens, where the
+        path is at most bound times longer than the shortest one.  A bound of 1 means the
+        path is optimal.
+    """
+    if moves is None:
+        moves = FACE_MOVES
+    start_state = encode_cube_state(start_cube.cube)
+    goal_state = encode_serialized_state(goal_state_serialized)
+    if not solvability_check(goal_state, moves).is_solvable(start_state):
+        return
+    if heuristic is None:
+        heuristic = open_pattern_databases(red_layer_pattern_databases(encode_cube_state(goal_cubix_tube.cube), moves))
+    compiled_moves = [move_tables()[move_name] for move_name in moves]
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+
+    g_score = {start_state: 0}
+    h_score = {start_state: heuristic.score(start_state)}
+    came_from = {}  # Track the path: state -> (parent state, move that led here)
+    open_states = {start_state}
+    inconsistent = set()
+    weight = initial_weight
+    best_length = None
+
+    while True:
+        # every search starts from a fresh heap over the open states, at the current weight
+        closed_set = set()
+        open_set = [(g_score[state] + weight * h_score[state], g_score[state], state) for state in open_states]
+        heapq.heapify(open_set)
+        expansions = 0
+        timed_out = False
+        while open_set and g_score.get(goal_state, float('inf')) > open_set[0][0]:
+            f_score, g, state = heapq.heappop(open_set)
+            if state not in open_states or g != g_score[state]:
+                continue  # superseded entry
+            open_states.discard(state)
+            closed_set.add(state)
+            expansions += 1
+            if deadline is not None and not expansions & 255 and time.perf_counter() >= deadline:
+                timed_out = True
+                break
+            for move in compiled_moves:
+                new_state = move.apply(state)
+                if g + 1 < g_score.get(new_state, float('inf')):
+                    g_score[new_state] = g + 1
+                    came_from[new_state] = (state, move.name)
+                    if new_state not in h_score:
+                        h_score[new_state] = heuristic.score(new_state)
+                    if new_state in closed_set:
+                        inconsistent.add(new_state)
+                    else:
+                        open_states.add(new_state)
+                        heapq.heappush(open_set, (g + 1 + weight * h_score[new_state], g + 1, new_state))
+
+        if goal_state in g_score and not timed_out:
+            # the shortest path is no shorter than the smallest unweighted f still waiting
+            waiting = [g_score[state] + h_score[state] for state in open_states | inconsistent]
+            lower_bound = min(waiting) if waiting else g_score[goal_state]
+            bound = max(min(weight, g_score[goal_state] / lower_bound) if lower_bound > 0 else weight, 1)
+            if best_length is None or g_score[goal_state] < best_length or bound < best_bound:
+                best_length, best_bound = g_score[goal_state], bound
+                yield reconstruct_path(came_from, goal_state), bound
+        if timed_out or weight <= 1 or (deadline is not None and time.perf_counter() >= deadline):
+            return
+        weight = max(1, weight - weight_step)
+        open_states |= inconsistent
+        inconsistent = set()
+
+
+# beam search:
+# memory-bounded solvers for workers with little RAM.  Each depth keeps at most beam_width
+# states, each remembering its parent's position in the previous depth, so memory is
+# O(beam_width * depth) and the path is read back through the layers.  Every random
+# choice comes from a random.Random(seed), so runs are reproducible.
+
+def _beam_descent(start_state, goal_state, compiled_moves, heuristic, beam_width, max_depth, rng, temperature=None):
+    """
+    One beam search from start_state.
 
-    while open_set:
-        _, current_g, current_serialized = heapq.heappop(open_set)
+    Args:
+        temperature: None keeps the beam_width best successors (ties broken by rng).  A number
+            samples beam_width successors without replacement with weight exp(-h / temperature),
+            which is stochastic beam search.
 
-        # Goal check
-        if current_serialized == goal_state_serialized:
-            return reconstruct_path(came_from, current_serialized)
+    Returns:
+        A tuple of (the path to the goal or None, the path to the lowest-h state seen, that state).
+    """
+    layers = [[(start_state, None, None)]]  # per depth: (state, parent position, move name)
+    seen = {start_state}
+    best = (heuristic.score(start_state), 0, 0)  # (h, depth, position)
+
+    def path_to(depth, position):
+        path = []
+        while depth > 0:
+            _, position, move_name = layers[depth][position]
+            path.append(move_name)
+            depth -= 1
+        return path[::-1]
+
+    if start_state == goal_state:
+        return [], [], start_state
+    for depth in range(1, max_depth + 1):
+        candidates = []
+        for position, (state, _, _) in enumerate(layers[-1]):
+            for move in compiled_moves:
+                new_state = move.apply(state)
+                if new_state in seen:
+                    continue
+                seen.add(new_state)
+                if new_state == goal_state:
+                    layers.append([(new_state, position, move.name)])
+                    return path_to(depth, 0), path_to(depth, 0), new_state
+                candidates.append((heuristic.score(new_state), new_state, position, move.name))
+        if not candidates:
+            break
+        if temperature is None:
+            keyed = [(h, rng.random(), state, position, move_name) for h, state, position, move_name in candidates]
+            chosen = heapq.nsmallest(beam_width, keyed)
+        else:
+            # Efraimidis-Spirakis: the largest log(u) / weight is a weighted sample without replacement
+            low = min(candidate[0] for candidate in candidates)
+            keyed = [(-math.log(1.0 - rng.random()) * math.exp(min((h - low) / temperature, 700)), h, state, position, move_name)
+                     for h, state, position, move_name in candidates]
+            chosen = [(h, key, state, position, move_name) for key, h, state, position, move_name in heapq.nsmallest(beam_width, keyed)]
+        layers.append([(state, position, move_name) for _, _, state, position, move_name in chosen])
+        # states that fell out of the beam may be reached again later
+        seen = {state for layer in layers for state, _, _ in layer}
+        layer_best = min((h, position) for position, (h, *_) in enumerate(chosen))
+        if layer_best[0] < best[0]:
+            best = (layer_best[0], depth, layer_best[1])
+    _, depth, position = best
+    return None, path_to(depth, position), layers[depth][position][0]
+
+
+def beam_search(start_cube, goal_state_serialized, goal_cubix_tube, beam_width=1000, max_depth=40, moves=None,
+                heuristic=None, seed=0, temperature=None):
+    """
+    Beam search: breadth-first, but only the beam_width most promising states of each depth
+    are kept.  Paths are not optimal and a narrow beam can miss the goal entirely.
 
-        closed_set.add(current_serialized)
+    Args:
+        start_cube: An instance of CubixTube representing the starting state.
+        goal_state_serialized: A serialized string representing the goal state.
+        goal_cubix_tube: The goal as a CubixTube, used for the default heuristic.
+        beam_width: States kept per depth.
+        max_depth: Deepest layer to search.
+        moves: Move names to search with; defaults to FACE_MOVES.
+        heuristic: Optional heuristic with a score(state) method.  Defaults to calculate_heuristic,
+            which need not be admissible here.
+        seed: Seed for tie-breaking and sampling.
+        temperature: None for plain beam search, or a temperature for stochastic beam search.
 
-        # Temporarily deserialize the cube for move exploration
-        # temp_cube_simplified = deserialize_cube_state(current_serialized)
-        # this might double execution time and possibly memory usage...
-        temp_cube = simplified_to_cubix_tube(current_serialized)
+    Returns:
+        A list of moves from the start state to the goal state, or None if the beam lost it.
+    """
+    if moves is None:
+        moves = FACE_MOVES
+    if heuristic is None:
+        heuristic = slot_heuristic(encode_cube_state(goal_cubix_tube.cube), calculate_heuristic)
+    path, _, _ = _beam_descent(encode_cube_state(start_cube.cube), encode_serialized_state(goal_state_serialized),
+                               [move_tables()[move_name] for move_name in moves], heuristic, beam_width, max_depth,
+                               random.Random(seed), temperature)
+    return path
+
+
+def random_restart_search(start_cube, goal_state_serialized, goal_cubix_tube, restarts=10, beam_width=1000, max_depth=40,
+                          moves=None, heuristic=None, seed=0, temperature=None, max_random_moves=10):
+    """
+    Beam search with random restarts, the supported form of the old randomness experiment.
+    When a beam loses the goal, the search jumps from the lowest-h state it reached by a few
+    apply_random_moves and starts a new beam there, to get out of the local minimum.
 
-        # Explore each move from the current state
+    Args:
+        restarts: How many times to perturb and search again after the first beam fails.
+        max_random_moves: Each jump makes between 1 and this many random moves.
+        The rest are as for beam_search.
 
-        for move_name in moves:
-            new_serialized = apply_move(temp_cube, move_name)
+    Returns:
+        A simplified list of moves from the start state to the goal state, or None.
+    """
+    if moves is None:
+        moves = FACE_MOVES
+    if heuristic is None:
+        heuristic = slot_heuristic(encode_cube_state(goal_cubix_tube.cube), calculate_heuristic)
+    compiled_moves = [move_tables()[move_name] for move_name in moves]
+    goal_state = encode_serialized_state(goal_state_serialized)
+    rng = random.Random(seed)
+    state = encode_cube_state(start_cube.cube)
+    path = []
+    for attempt in range(restarts + 1):
+        found, best_path, state = _beam_descent(state, goal_state, compiled_moves, heuristic, beam_width, max_depth,
+                                                rng, temperature)
+        if found is not None:
+            return simplify_moves(path + found)
+        path.extend(best_path)
+        cube = decode_to_cubix_tube(state)
+        _, applied_moves = apply_random_moves(cube, rng.randint(1, max_random_moves), moves, rng)
+        path.extend(applied_moves)
+        state = encode_cube_state(cube.cube)
+    return None
+
+
+# move sequence pruning:
+# Moves with the same touched slots turn the same face.  Two turns of one face in
+# a row are redundant when together they equal no move or one move of the set
+# (L L is L2, L L_Prime is nothing), which also covers a move followed by its
+# inverse.  Faces with disjoint slots (R/L, F/B, U/D and the slices between them)
+# commute, so of the two orders only the one with the lower face index is kept.
+def _transform_signature(transform):
+    # the outputs on these probes pin a transform down completely: the uniform states
+    # give every orientation table, the distinct state then gives the permutation
+    probes = [bytes([code]) * NUM_SLOTS for code in range(NUM_SLOT_CODES)]
+    probes.append(bytes(range(CORNER_CODE_BASE, CORNER_CODE_BASE + NUM_SLOTS)))
+    return tuple(transform(probe) for probe in probes)
+
+
+def move_successors(moves):
+    """
+    Map each move name (and None, for the first move) to the compiled moves allowed after it.
+    """
+    tables = move_tables()
+    compiled_moves = [tables[move_name] for move_name in moves]
+    faces = []
+    for move in compiled_moves:
+        if set(move.touched) not in faces:
+            faces.append(set(move.touched))
+    face_index = {move.name: faces.index(set(move.touched)) for move in compiled_moves}
+    single_moves = {_transform_signature(lambda state: state)}
+    single_moves.update(_transform_signature(move.apply) for move in compiled_moves)
+
+    successors = {None: compiled_moves}
+    for first in compiled_moves:
+        allowed = []
+        for second in compiled_moves:
+            first_face, second_face = face_index[first.name], face_index[second.name]
+            if first_face == second_face:
+                pair = _transform_signature(lambda state: second.apply(first.apply(state)))
+                if pair in single_moves:
+                    continue
+            elif faces[first_face].isdisjoint(faces[second_face]) and second_face < first_face:
+                continue
+            allowed.append(second)
+        successors[first.name] = allowed
+    return successors
 
-            if new_serialized in closed_set:
-                continue  # Skip already visited states
 
-            tentative_g_score = current_g + 1  # Cost of each move is 1
+def ida_star_search(start_cube, goal_state_serialized, goal_cubix_tube, moves=None, heuristic=None, max_depth=20):
+    """
+    Iterative-deepening A*: repeated depth-first searches bounded by f = g + h, raising the
+    bound to the smallest f that exceeded it.  Only the current path is kept, so memory is
+    O(depth) instead of every generated state.
 
-            # Update path and score if a better path is found
-            if new_serialized not in g_score or tentative_g_score < g_score[new_serialized]:
+    Args:
+        start_cube: An instance of CubixTube representing the starting state.
+        goal_state_serialized: A serialized string representing the goal state.
+        goal_cubix_tube: The goal as a CubixTube, used for the default heuristic.
+        moves: Move names to search with; defaults to FACE_MOVES.
+        heuristic: Optional heuristic with a score(state) method.  Defaults to the red layer
+            pattern databases, built in memory; IDA* wants an admissible heuristic on the
+            scale of moves, since the bound only rises to the next f value each iteration.
+        max_depth: Paths are never extended past this many moves.
 
-                new_cubix_tube = simplified_to_cubix_tube(new_serialized)
-                came_from[new_serialized] = current_serialized
-                g_score[new_serialized] = tentative_g_score
-                f_score = tentative_g_score + calculate_heuristic_alpha(new_cubix_tube.cube, goal_cubix_tube.cube, orientation_matrix)
+    Returns:
+        A list of moves from the start state to the goal state, or None.
+    """
+    if moves is None:
+        moves = FACE_MOVES
+    start_state = encode_cube_state(start_cube.cube)
+    goal_state = encode_serialized_state(goal_state_serialized)
+    if not solvability_check(goal_state, moves).is_solvable(start_state):
+        return None
+    if heuristic is None:
+        heuristic = open_pattern_databases(red_layer_pattern_databases(encode_cube_state(goal_cubix_tube.cube), moves))
+    successors = move_successors(moves)
+
+    # the path is a stack: moves are pushed going down and popped to undo them.  States
+    # stay immutable bytes rather than one buffer turned in place and turned back: a
+    # compiled move builds the 27 byte child in about the time an in-place turn of the
+    # touched slots takes, the undo would cost that again, and the cycle check needs a
+    # hashable copy of the buffer anyway
+    path = []
+    on_path = {start_state}
+
+    def search(state, g, previous_move, bound):
+        f = g + heuristic.score(state)
+        if f > bound:
+            return f
+        if state == goal_state:
+            return True
+        if g == max_depth:
+            return float('inf')
+        minimum = float('inf')
+        for move in successors[previous_move]:
+            new_state = move.apply(state)
+            if new_state in on_path:
+                continue
+            path.append(move.name)
+            on_path.add(new_state)
+            result = search(new_state, g + 1, move.name, bound)
+            if result is True:
+                return True
+            path.pop()
+            on_path.discard(new_state)
+            minimum = min(minimum, result)
+        return minimum
+
+    bound = heuristic.score(start_state)
+    while True:
+        result = search(start_state, 0, None, bound)
+        if result is True:
+            return path
+        if result == float('inf'):
+            return None
+        bound = result
+
+
+def bidirectional_search(start_cube, goal_state_serialized, moves=None, max_depth=20):
+    """
+    Breadth-first search from the start and the goal at once, joining the two half-paths
+    where the frontiers meet.  A depth-d solution costs about 2*b^(d/2) states instead of b^d.
 
-                if f_score < min_heuristic:
-                    min_heuristic = f_score
-                    new_cubix_tube.print_cube_slices()
-                    goal_cubix_tube.print_cube_slices()
-                heapq.heappush(open_set, (f_score, tentative_g_score, new_serialized))
+    The backward frontier is grown with each move's inverse from move_pairs: if the inverse
+    of m takes t back to p, then m takes p forward to t, so the backward half is already in
+    forward order when it is joined.  Whole layers are expanded, always on the smaller side,
+    so the first meeting layer gives a shortest path.
 
-        if random.randint(1, 1000) == 1:
-            print("Min Heuristic: ", min_heuristic, "Closed Set Size: ", len(closed_set))
-           
+    Args:
+        start_cube: An instance of CubixTube representing the starting state.
+        goal_state_serialized: A serialized string representing the goal state.
+        moves: Move names to search with; defaults to FACE_MOVES.
+        max_depth: Longest path to look for, over both halves.
 
-    return None  # Return None if no path to goal state is found
+    Returns:
+        A list of moves from the start state to the goal state, or None.
+    """
+    if moves is None:
+        moves = FACE_MOVES
+    tables = move_tables()
+    forward_moves = [(move_name, tables[move_name]) for move_name in moves]
+    backward_moves = [(move_name, tables[move_pairs[move_name][1]]) for move_name in moves]
+    start_state = encode_cube_state(start_cube.cube)
+    goal_state = encode_serialized_state(goal_state_serialized)
+    if not solvability_check(goal_state, moves).is_solvable(start_state):
+        return None
+    if start_state == goal_state:
+        return []
+
+    # state -> (neighbour toward the start or goal, move name, depth)
+    forward = {start_state: (None, None, 0)}
+    backward = {goal_state: (None, None, 0)}
+    forward_frontier = [start_state]
+    backward_frontier = [goal_state]
+    forward_depth = backward_depth = 0
+
+    while forward_frontier and backward_frontier and forward_depth + backward_depth < max_depth:
+        expand_forward = len(forward_frontier) <= len(backward_frontier)
+        if expand_forward:
+            frontier, visited, other, layer_moves = forward_frontier, forward, backward, forward_moves
+            forward_depth += 1
+            depth = forward_depth
+        else:
+            frontier, visited, other, layer_moves = backward_frontier, backward, forward, backward_moves
+            backward_depth += 1
+            depth = backward_depth
+
+        next_frontier = []
+        meeting, meeting_length = None, None
+        for state in frontier:
+            for move_name, move in layer_moves:
+                new_state = move.apply(state)
+                if new_state in visited:
+                    continue
+                visited[new_state] = (state, move_name, depth)
+                next_frontier.append(new_state)
+                if new_state in other:
+                    length = depth + other[new_state][2]
+                    if meeting_length is None or length < meeting_length:
+                        meeting, meeting_length = new_state, length
+        if meeting is not None:
+            return _join_half_paths(forward, backward, meeting)
+        if expand_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+def _join_half_paths(forward, backward, meeting):
+    # walk back to the start for the first half, then on to the goal for the second
+    path = []
+    state = meeting
+    while forward[state][0] is not None:
+        state, move_name, _ = forward[state]
+        path.append(move_name)
+    path.reverse()
+    state = meeting
+    while backward[state][0] is not None:
+        state, move_name, _ = backward[state]
+        path.append(move_name)
+    return path
 
 
 orientation_matrix = {1: [2, 3, 4, 5, 6, 9],
@@ -978,71 +2025,574 @@ def calculate_heuristic_alpha(cube_state, solved_state, orientation_matrix):
     return score
 
 
+# table driven heuristics:
+# calculate_heuristic and calculate_heuristic_alpha are both sums of independent
+# per-slot penalties, so each one reduces to a lookup table per slot indexed by
+# slot code.  The tables are derived by running the reference function on cubes
+# holding a single piece, which keeps them identical to it by construction.
+#
+# For incremental scoring a node carries its per-slot contributions, and a child
+# only re-scores the slots its move touched (at most 9, and none at all when the
+# move misses every scored slot, e.g. U for the X=2 red layer).
+def slot_getter(slots):
+    # itemgetter, except it always returns a tuple
+    if len(slots) == 0:
+        return lambda state: ()
+    if len(slots) == 1:
+        slot = slots[0]
+        return lambda state: (state[slot],)
+    return operator.itemgetter(*slots)
+
+
+class SlotHeuristic:
+    def __init__(self, tables):
+        # tables[slot][code] -> penalty for that code in that slot
+        self.tables = tuple(bytes(table) for table in tables)
+        # slots whose table is all zeros never contribute and are skipped
+        self.slots = tuple(slot for slot, table in enumerate(self.tables) if any(table))
+        self._scored_tables = tuple(self.tables[slot] for slot in self.slots)
+        self._scored_codes = slot_getter(self.slots)
+        # compiled move -> (tables, getter) for the scored slots that move touches
+        self._touched = {}
+        # A move touches 9 slots, so rescoring only beats a full score when more slots
+        # than that are scored.  calculate_heuristic_alpha's layer is cheaper to score outright.
+        self.incremental = len(self.slots) > 9
+        self._array_tables = None
+
+    def score(self, state):
+        return sum(map(operator.getitem, self._scored_tables, self._scored_codes(state)))
+
+    def score_array(self, states):
+        """
+        score of every row of an (N, 27) state array (see BatchMoves), in one NumPy lookup.
+        """
+        if self._array_tables is None:
+            _require_numpy()
+            # the scored slots' tables back to back, each padded to every byte value
+            flat = np.frombuffer(b''.join(table.ljust(len(IDENTITY_TABLE), b'\0') for table in self._scored_tables),
+                                 dtype=np.uint8)
+            self._array_tables = (flat, list(self.slots), np.arange(len(self.slots)) * len(IDENTITY_TABLE))
+        flat, slots, offsets = self._array_tables
+        return flat[offsets + states[:, slots]].sum(axis=1, dtype=np.int64)
+
+    def contributions(self, state):
+        """
+        Per-slot penalties of a state as bytes; they sum to score(state).
+        """
+        return bytes(map(operator.getitem, self.tables, state))
 
-def reconstruct_path(came_from, current_serialized):
-    # Reconstruct the path from start to goal by following came_from links
-    path = [current_serialized]
-    while current_serialized in came_from:
-        current_serialized = came_from[current_serialized]
-        path.append(current_serialized)
-    path.reverse()
-    # now we need to check what moves were made to get this path and return that.  The way to do this is to check all moves and see which move was made to get to the next state in the path
+    def rescore(self, score, contributions, move, new_state):
+        """
+        Score of new_state == move.apply(state), given the score and contributions of state.
+        Only the slots touched by the move are looked up.
+        """
+        touched = self._touched.get(move)
+        if touched is None:
+            slots = tuple(slot for slot in move.touched if slot in self.slots)
+            touched = self._touched[move] = (tuple(self.tables[slot] for slot in slots), slot_getter(slots))
+        tables, codes = touched
+        if not tables:
+            return score
+        return score - sum(codes(contributions)) + sum(map(operator.getitem, tables, codes(new_state)))
 
-    possible_move_names = ['L', 'L_Prime', 'R', 'R_Prime', 'F', 'F_Prime', 'B', 'B_Prime', 'U', 'U_Prime', 'D', 'D_Prime', 'L2', 'R2', 'F2', 'B2', 'U2', 'D2']
 
-    move_path = []
-    for i in range(len(path) - 1):
-        current_state = deserialize_cube_state(path[i])
-        next_state = deserialize_cube_state(path[i + 1])
-        for move_name in possible_move_names:
-            temp_cube = CubixTube()
-            temp_cube.cube = current_state
-            getattr(temp_cube, move_name)()
-            if cubes_are_equal(temp_cube.cube, next_state):
-                move_path.append(move_name)
-                break
-    
-    return move_path
+# scores every state 0, which turns A* into breadth-first search; the tests use it as the
+# reference for shortest paths
+ZERO_HEURISTIC = SlotHeuristic([bytes(NUM_SLOT_CODES)] * NUM_SLOTS)
 
-# code to return a hashed cube state for efficiency
-def hash_cube_state(cube):
 
-    serialized_state = serialize_cube_state(cube)
-    return hash(serialized_state)
+def derive_slot_heuristic(goal_state, heuristic_function, *args):
+    """
+    Build a SlotHeuristic equivalent to heuristic_function(cube, goal_cube, *args).
 
-def cubes_are_equal(cube1, cube2):
+    Args:
+        goal_state: The encoded goal state.
+        heuristic_function: calculate_heuristic, calculate_heuristic_alpha, or any
+            other function that scores each slot independently and ignores empty slots.
+    """
+    goal_cube = decode_cube_state(goal_state)
+    tables = []
     for x in range(3):
         for y in range(3):
             for z in range(3):
-                piece1 = cube1[x][y][z]
-                piece2 = cube2[x][y][z]
-                
-                if type(piece1) != type(piece2):
-                    return False
-                elif piece1 is None and piece2 is None:
-                    continue
-                elif isinstance(piece1, str) or isinstance(piece2, str):
-                    if piece1 != piece2:
-                        return False
-                elif piece1.color != piece2.color or piece1.orientation != piece2.orientation:
-                    return False
-    return True
+                table = bytearray(NUM_SLOT_CODES)
+                for code in range(NUM_SLOT_CODES):
+                    probe = [[[None for _ in range(3)] for _ in range(3)] for _ in range(3)]
+                    probe[x][y][z] = decode_slot(code)
+                    table[code] = heuristic_function(probe, goal_cube, *args)
+                tables.append(table)
+    return SlotHeuristic(tables)
 
-move_pairs = {
-    'L': ('L', 'L_Prime'),
-    'L_Prime': ('L_Prime', 'L'),
-    'L2': ('L2', 'L2'),  # L2 is its own inverse
-    'R': ('R', 'R_Prime'),
-    'R_Prime': ('R_Prime', 'R'),
-    'R2': ('R2', 'R2'),  # R2 is its own inverse
-    'F': ('F', 'F_Prime'),
-    'F_Prime': ('F_Prime', 'F'),
-    'F2': ('F2', 'F2'),  # F2 is its own inverse
-    'B': ('B', 'B_Prime'),
-    'B_Prime': ('B_Prime', 'B'),
-    'B2': ('B2', 'B2'),  # B2 is its own inverse
-    'U': ('U', 'U_Prime'),
-    'U_Prime': ('U_Prime', 'U'),
+
+_SLOT_HEURISTICS = {}
+
+
+def slot_heuristic(goal_state, heuristic_function, *args):
+    """
+    derive_slot_heuristic, derived once per goal and function and then reused.
+    """
+    # the function itself, not its name, so redefined or same-named functions get their own tables
+    key = (goal_state, heuristic_function, repr(args))
+    if key not in _SLOT_HEURISTICS:
+        _SLOT_HEURISTICS[key] = derive_slot_heuristic(goal_state, heuristic_function, *args)
+    return _SLOT_HEURISTICS[key]
+
+
+def calculate_heuristic_batch(states, solved_state):
+    """
+    calculate_heuristic for every row of an (N, 27) encoded state array.  The per-slot
+    penalties (0/2/3/5/7) are looked up in tables probed from calculate_heuristic itself.
+
+    Args:
+        states: The states, as from states_to_array or BatchMoves.children.
+        solved_state: The goal cube as nested lists, as for calculate_heuristic.
+
+    Returns:
+        An int64 array of the N scores.
+    """
+    return slot_heuristic(encode_cube_state(solved_state), calculate_heuristic).score_array(states)
+
+
+def calculate_heuristic_alpha_batch(states, solved_state, orientation_matrix):
+    """
+    calculate_heuristic_alpha for every row of an (N, 27) encoded state array, with the
+    0/1/3/4/11/19 penalties and orientation_matrix probed the same way.
+
+    Returns:
+        An int64 array of the N scores.
+    """
+    return slot_heuristic(encode_cube_state(solved_state), calculate_heuristic_alpha, orientation_matrix).score_array(states)
+
+
+# pattern databases:
+# A pattern looks at a set of slots closed under the move set and keeps some of
+# the pieces in them: either exactly ("orientation") or only where they are
+# ("identity"); every other piece becomes a wildcard.  The abstract states are
+# ranked densely, a breadth-first search backwards from the abstract goal finds
+# the exact distance of each one, and the distances are stored a nibble each.
+# A distance in the abstract puzzle never exceeds the real one, so lookups are
+# admissible, and so is the max over several databases.
+PDB_MAGIC = b'CUBIXPDB'
+PDB_HEADER = struct.Struct('<8s32sQBB')  # magic, signature, number of states, depth, complete
+PDB_UNKNOWN = 15
+PDB_MAX_DEPTH = PDB_UNKNOWN - 1
+PDB_BATCH_STATES = 1 << 16  # frontier states expanded per BatchMoves call
+
+# projected codes for pieces a pattern keeps without orientation, and for dropped pieces
+IDENTITY_CODE_BASE = NUM_SLOT_CODES
+WILDCARD_CODE = IDENTITY_CODE_BASE + 2 * len(PIECE_COLORS)
+
+CORNER_SLOTS = tuple(slot_index(x, y, z) for x in (0, 2) for y in (0, 2) for z in (0, 2))
+EDGE_SLOTS = tuple(
+    slot_index(x, y, z) for x in range(3) for y in range(3) for z in range(3) if (x, y, z).count(1) == 1
+)
+
+
+def identity_code(code):
+    # the code a piece has when only its type and color are kept
+    piece = SLOT_CODE_PIECES[code]
+    if not isinstance(piece, tuple):
+        return code
+    piece_class, color, _ = piece
+    return IDENTITY_CODE_BASE + 3 * (piece_class is StraightPiece) + PIECE_COLORS.index(color)
+
+
+def _distinct_permutations(symbols):
+    # every distinct arrangement of a multiset, in lexicographic order
+    counts = {}
+    for symbol in symbols:
+        counts[symbol] = counts.get(symbol, 0) + 1
+    ordered = sorted(counts)
+    arrangement = []
+
+    def extend():
+        if len(arrangement) == len(symbols):
+            yield bytes(arrangement)
+            return
+        for symbol in ordered:
+            if counts[symbol]:
+                counts[symbol] -= 1
+                arrangement.append(symbol)
+                yield from extend()
+                arrangement.pop()
+                counts[symbol] += 1
+
+    return list(extend())
+
+
+class PatternDatabase:
+    def __init__(self, name, goal_state, moves, slots, track):
+        """
+        Args:
+            name: A short name, used for the default file name.
+            goal_state: The encoded state distances are measured to.
+            moves: The move names distances are counted in.
+            slots: The slots the pattern looks at; must be closed under the moves.
+            track: Maps (piece class, color) to "orientation" to keep those pieces exactly,
+                or to "identity" to keep only their positions.  Other pieces are dropped.
+        """
+        import hashlib
+
+        self.name = name
+        self.moves = tuple(moves)
+        self.slots = tuple(sorted(slots))
+        tables = move_tables()
+        for move_name in self.moves:
+            if {tables[move_name].permutation[slot] for slot in self.slots} != set(self.slots):
+                raise ValueError(f"Slots of pattern {name} are not closed under {move_name}")
+
+        # code -> projected code, and code -> identity symbol used for the arrangement rank
+        projection = bytearray(IDENTITY_TABLE)
+        identities = bytearray(IDENTITY_TABLE)
+        oriented = set()
+        for code, piece in enumerate(SLOT_CODE_PIECES):
+            if not isinstance(piece, tuple):
+                continue
+            level = track.get(piece[:2])
+            if level == "orientation":
+                identities[code] = identity_code(code)
+                oriented.add(identity_code(code))
+            elif level == "identity":
+                projection[code] = identities[code] = identity_code(code)
+            elif level is None:
+                projection[code] = identities[code] = WILDCARD_CODE
+            else:
+                raise ValueError(f"Unknown tracking level: {level!r}")
+        self._projection = bytes(projection)
+        self._identities = bytes(identities)
+        self._orbit = slot_getter(self.slots)
+        goal_codes = self._orbit(goal_state.translate(self._projection))
+
+        # orientations a kept piece can take: its goal codes closed under the moves
+        self._domains = {}
+        for code in goal_codes:
+            symbol = identities[code]
+            if symbol in oriented:
+                self._domains.setdefault(symbol, set()).add(code)
+        for domain in self._domains.values():
+            frontier = list(domain)
+            while frontier:
+                code = frontier.pop()
+                for move_name in self.moves:
+                    for table in tables[move_name].orientation:
+                        if table[code] not in domain:
+                            domain.add(table[code])
+                            frontier.append(table[code])
+        self._domains = {symbol: tuple(sorted(domain)) for symbol, domain in self._domains.items()}
+        digits = bytearray(256)
+        for domain in self._domains.values():
+            for digit, code in enumerate(domain):
+                digits[code] = digit
+        self._digits = bytes(digits)
+
+        # rank = arrangement index * orientation states + mixed radix orientation digits
+        self._orientation_states = 1
+        for code in goal_codes:
+            if identities[code] in oriented:
+                self._orientation_states *= len(self._domains[identities[code]])
+        self._arrangement_list = []
+        self._arrangements = {}
+        for index, arrangement in enumerate(_distinct_permutations([identities[code] for code in goal_codes])):
+            weights = [0] * len(arrangement)
+            weight = 1
+            for position in reversed(range(len(arrangement))):
+                if arrangement[position] in oriented:
+                    weights[position] = weight
+                    weight *= len(self._domains[arrangement[position]])
+            self._arrangement_list.append((arrangement, tuple(weights)))
+            self._arrangements[arrangement] = (index * self._orientation_states, tuple(weights))
+        self.num_states = len(self._arrangement_list) * self._orientation_states
+
+        self.goal_rank = self.rank(goal_state)
+        self.signature = hashlib.sha256(
+            repr((self.moves, self.slots, self._projection, bytes(goal_codes))).encode()
+        ).digest()
+        self.depth = -1
+        self.complete = False
+        self._table = None
+        self._offset = 0
+        self._rank_arrays = None
+
+    def __repr__(self):
+        return f"PatternDatabase({self.name!r}, {self.num_states} states)"
+
+    def rank(self, state):
+        """
+        Dense index of a state's abstraction, or None if it holds different pieces than the goal.
+        """
+        entry = self._arrangements.get(bytes(self._orbit(state.translate(self._identities))))
+        if entry is None:
+            return None
+        base, weights = entry
+        return base + sum(map(operator.mul, weights, self._orbit(state.translate(self._digits))))
+
+    def unrank(self, index):
+        """
+        The abstract state with the given rank; slots outside the pattern are left empty.
+        """
+        arrangement_index, orientation_rank = divmod(index, self._orientation_states)
+        arrangement, weights = self._arrangement_list[arrangement_index]
+        state = bytearray(NUM_SLOTS)
+        for slot, symbol, weight in zip(self.slots, arrangement, weights):
+            if weight:
+                digit, orientation_rank = divmod(orientation_rank, weight)
+                state[slot] = self._domains[symbol][digit]
+            else:
+                state[slot] = symbol
+        return bytes(state)
+
+    def lookup(self, state):
+        """
+        Exact abstract distance to the goal, which is a lower bound on the real one.
+        """
+        index = self.rank(state)
+        if index is None:
+            # pieces the goal doesn't have can never reach it
+            return self.depth + 1
+        value = self._table[self._offset + (index >> 1)]
+        value = value >> 4 if index & 1 else value & 15
+        return self.depth + 1 if value == PDB_UNKNOWN else value
+
+    def build(self, path=None, max_depth=PDB_MAX_DEPTH, verbose=False):
+        """
+        Fill in the distance table by breadth-first search backwards from the goal.
+
+        With a path the table is saved after every completed layer.  A partial file left by
+        an interrupted build is resumed from its last completed layer, and a complete file
+        is memory-mapped without searching.  A file built for a different pattern is rebuilt.
+        """
+        if path is not None and self.load(path, partial=True):
+            if self.complete or self.depth >= max_depth:
+                return self
+            table = bytearray(self._table[self._offset:])
+            frontier = [
+                index for index in range(self.num_states)
+                if (table[index >> 1] >> 4 if index & 1 else table[index >> 1] & 15) == self.depth
+            ]
+        else:
+            table = bytearray(b'\xff' * ((self.num_states + 1) // 2))
+            table[self.goal_rank >> 1] &= 0xF0 if self.goal_rank & 1 == 0 else 0x0F
+            self.depth, self.complete = 0, False
+            frontier = [self.goal_rank]
+        self._table, self._offset = table, 0
+
+        # predecessors of a state come from the inverse moves
+        inverse_moves = [move_pairs[move_name][1] for move_name in self.moves]
+        if _numpy_available():
+            # the frontier is kept as abstract states and expanded a chunk at a time
+            expand = self._expand_batched
+            inverse_moves = BatchMoves(inverse_moves)
+            frontier = states_to_array([self.unrank(index) for index in frontier])
+        else:
+            expand = self._expand
+            inverse_moves = [move_tables()[move_name] for move_name in inverse_moves]
+        while len(frontier) and self.depth < max_depth:
+            next_depth = self.depth + 1
+            frontier = expand(table, frontier, next_depth, inverse_moves)
+            if len(frontier):
+                self.depth = next_depth
+            self.complete = not len(frontier)
+            if verbose:
+                print(f"{self.name}: depth {next_depth}, {len(frontier)} states")
+            if path is not None:
+                self.save(path)
+        if path is not None:
+            self.load(path)
+        return self
+
+    def _expand(self, table, frontier, depth, inverse_moves):
+        # ranks of the unseen predecessors of the frontier ranks, marked at depth in table
+        next_frontier = []
+        for index in frontier:
+            state = self.unrank(index)
+            for move in inverse_moves:
+                child = self.rank(move.apply(state))
+                byte = table[child >> 1]
+                if child & 1:
+                    if byte >> 4 == PDB_UNKNOWN:
+                        table[child >> 1] = (byte & 0x0F) | (depth << 4)
+                        next_frontier.append(child)
+                elif byte & 0x0F == PDB_UNKNOWN:
+                    table[child >> 1] = (byte & 0xF0) | depth
+                    next_frontier.append(child)
+        return next_frontier
+
+    def _expand_batched(self, table, frontier, depth, inverse_moves):
+        # the same with BatchMoves, on an (N, 27) array of frontier states
+        nibbles = np.frombuffer(table, dtype=np.uint8)
+        next_frontier = [frontier[:0]]
+        for start in range(0, len(frontier), PDB_BATCH_STATES):
+            children = inverse_moves.children(frontier[start:start + PDB_BATCH_STATES])
+            ranks, first = np.unique(self.rank_array(children), return_index=True)
+            values = nibbles[ranks >> 1]
+            odd = (ranks & 1).astype(bool)
+            unseen = np.where(odd, values >> 4, values & 0x0F) == PDB_UNKNOWN
+            # a rank is unique within each parity, so each byte is written once per pass
+            for parity, keep, value in ((False, 0xF0, depth), (True, 0x0F, depth << 4)):
+                positions = ranks[unseen & (odd == parity)] >> 1
+                nibbles[positions] = (nibbles[positions] & keep) | value
+            next_frontier.append(children[first[unseen]])
+        return np.concatenate(next_frontier)
+
+    def rank_array(self, states):
+        """
+        rank of every row of an (N, 27) state array, as int64 with -1 where rank is None.
+        """
+        if self._rank_arrays is None:
+            _require_numpy()
+            # an arrangement packs into one integer, a digit per slot; the list is in
+            # lexicographic order, so the packed keys come out sorted
+            symbols = sorted({symbol for arrangement, _ in self._arrangement_list for symbol in arrangement})
+            symbol_digits = np.full(256, len(symbols), dtype=np.int64)  # other symbols match no key
+            symbol_digits[symbols] = np.arange(len(symbols))
+            places = (len(symbols) + 1) ** np.arange(len(self.slots) - 1, -1, -1, dtype=np.int64)
+            arrangements = np.array([list(arrangement) for arrangement, _ in self._arrangement_list], dtype=np.intp)
+            keys = symbol_digits[arrangements] @ places
+            weights = np.array([weights for _, weights in self._arrangement_list], dtype=np.int64)
+            self._rank_arrays = (symbol_digits[np.frombuffer(self._identities, dtype=np.uint8)], places, keys,
+                                 weights, np.frombuffer(self._digits, dtype=np.uint8).astype(np.int64))
+        code_digits, places, keys, weights, orientation_digits = self._rank_arrays
+        orbit = states[:, list(self.slots)]
+        state_keys = code_digits[orbit] @ places
+        index = np.minimum(np.searchsorted(keys, state_keys), len(keys) - 1)
+        ranks = index * self._orientation_states + (weights[index] * orientation_digits[orbit]).sum(axis=1)
+        return np.where(keys[index] == state_keys, ranks, -1)
+
+    def save(self, path):
+        # write to a temporary file and rename, so an interrupted save never loses a layer
+        header = PDB_HEADER.pack(PDB_MAGIC, self.signature, self.num_states, self.depth, self.complete)
+        with open(path + '.tmp', 'wb') as handle:
+            handle.write(header)
+            handle.write(self._table[self._offset:])
+        os.replace(path + '.tmp', path)
+
+    def load(self, path, partial=False):
+        """
+        Memory-map a saved table.  Returns False if there is no usable file for this pattern.
+        """
+        if not os.path.exists(path) or os.path.getsize(path) < PDB_HEADER.size:
+            return False
+        with open(path, 'rb') as handle:
+            table = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, signature, num_states, depth, complete = PDB_HEADER.unpack_from(table)
+        if magic != PDB_MAGIC or signature != self.signature or num_states != self.num_states or \
+                (not complete and not partial):
+            # a stale or unfinished table is not used, so its mapping is not kept either
+            table.close()
+            return False
+        self._table, self._offset = table, PDB_HEADER.size
+        self.depth, self.complete = depth, bool(complete)
+        return True
+
+
+class PatternDatabaseHeuristic:
+    """
+    Admissible heuristic taking the max over several pattern databases; pass it as the
+    heuristic of the A* drivers.
+    """
+    incremental = False
+
+    def __init__(self, databases):
+        self.databases = tuple(databases)
+
+    def score(self, state):
+        return max([database.lookup(state) for database in self.databases])
+
+
+def red_layer_pattern_databases(goal_state, moves):
+    """
+    Pattern databases for the red X=2 layer that calculate_heuristic_alpha targets.
+
+    corners: every piece in the corner slots, the red ones with their orientation.
+    red_edges: the red pieces in the edge slots with their orientation.
+    """
+    piece_kinds = [(piece_class, color) for piece_class in (CornerPiece, StraightPiece) for color in PIECE_COLORS]
+    corners_track = {kind: "orientation" if kind[1] == "Red" else "identity" for kind in piece_kinds}
+    red_track = {kind: "orientation" for kind in piece_kinds if kind[1] == "Red"}
+    return [
+        PatternDatabase("corners", goal_state, moves, CORNER_SLOTS, corners_track),
+        PatternDatabase("red_edges", goal_state, moves, EDGE_SLOTS, red_track),
+    ]
+
+
+_PATTERN_DATABASES = {}  # signature -> database built in memory
+
+
+def open_pattern_databases(databases, directory=None, verbose=False):
+    """
+    Load each database from directory/<name>.pdb, building or resuming it first if needed.
+    Without a directory the databases are built in memory, once per process; later calls
+    for the same pattern reuse the built table.
+    """
+    if directory is None:
+        for database in databases:
+            if database.signature not in _PATTERN_DATABASES:
+                _PATTERN_DATABASES[database.signature] = database.build(verbose=verbose)
+        return PatternDatabaseHeuristic([_PATTERN_DATABASES[database.signature] for database in databases])
+    os.makedirs(directory, exist_ok=True)
+    for database in databases:
+        database.build(os.path.join(directory, f"{database.name}.pdb"), verbose=verbose)
+    return PatternDatabaseHeuristic(databases)
+
+
+def reconstruct_path(came_from, current_state):
+    """
+    Reconstruct the path from start to goal by following came_from links.
+
+    Args:
+        came_from: Maps each reached state to (parent state, move name).
+        current_state: The state to walk back from.
+
+    Returns:
+        The list of move names from the start state to current_state.
+    """
+    # every link already records its move, so there is nothing to replay
+    move_path = []
+    while current_state in came_from:
+        current_state, move_name = came_from[current_state]
+        move_path.append(move_name)
+    move_path.reverse()
+    return move_path
+
+# code to return a hashed cube state for efficiency
+def hash_cube_state(cube):
+
+    serialized_state = serialize_cube_state(cube)
+    return hash(serialized_state)
+
+def cubes_are_equal(cube1, cube2):
+    for x in range(3):
+        for y in range(3):
+            for z in range(3):
+                piece1 = cube1[x][y][z]
+                piece2 = cube2[x][y][z]
+                
+                if type(piece1) != type(piece2):
+                    return False
+                elif piece1 is None and piece2 is None:
+                    continue
+                elif isinstance(piece1, str) or isinstance(piece2, str):
+                    if piece1 != piece2:
+                        return False
+                elif piece1.color != piece2.color or piece1.orientation != piece2.orientation:
+                    return False
+    return True
+
+move_pairs = {
+    'L': ('L', 'L_Prime'),
+    'L_Prime': ('L_Prime', 'L'),
+    'L2': ('L2', 'L2'),  # L2 is its own inverse
+    'R': ('R', 'R_Prime'),
+    'R_Prime': ('R_Prime', 'R'),
+    'R2': ('R2', 'R2'),  # R2 is its own inverse
+    'F': ('F', 'F_Prime'),
+    'F_Prime': ('F_Prime', 'F'),
+    'F2': ('F2', 'F2'),  # F2 is its own inverse
+    'B': ('B', 'B_Prime'),
+    'B_Prime': ('B_Prime', 'B'),
+    'B2': ('B2', 'B2'),  # B2 is its own inverse
+    'U': ('U', 'U_Prime'),
+    'U_Prime': ('U_Prime', 'U'),
     'U2': ('U2', 'U2'),  # U2 is its own inverse
     'D': ('D', 'D_Prime'),
     'D_Prime': ('D_Prime', 'D'),
@@ -1059,6 +2609,11 @@ move_pairs = {
     
 }
 
+# the move sets the solvers search with: a_star_search_alpha's quarter, prime and half
+# turns of the six faces, and a_star_search's quarter turns of the faces and slices
+FACE_MOVES = ['L', 'L_Prime', 'R', 'R_Prime', 'F', 'F_Prime', 'B', 'B_Prime', 'U', 'U_Prime', 'D', 'D_Prime', 'L2', 'R2', 'F2', 'B2', 'U2', 'D2']
+SLICE_MOVES = ['L', 'R', 'F', 'B', 'U', 'D', 'M_RL', 'M_FB', 'M_UD']
+
 # returns a serialized state after applying a move:
 def apply_move(cube, move_name):
     """
@@ -1074,7 +2629,7 @@ def apply_move(cube, move_name):
     getattr(cube, inverse_move)()
     return serialized_state
 
-def apply_moves_random(cube, moves, num_moves):
+def apply_moves_random(cube, moves, num_moves, rng=random):
     """
     Apply a random sequence of moves to the cube.
 
@@ -1082,14 +2637,966 @@ def apply_moves_random(cube, moves, num_moves):
         cube: An instance of CubixTube representing the cube to scramble.
         moves: A list of available moves to choose from.
         num_moves: The number of random moves to apply.
+        rng: Where the moves are drawn from; pass a random.Random to make it reproducible.
     """
 
     #
     for _ in range(num_moves):
-        move_name = random.choice(moves)
+        move_name = rng.choice(moves)
         getattr(cube, move_name)()
 
 
+# precomputed move tables:
+# every move in move_pairs is compiled once, by probing the CubixTube method, into
+# a slot permutation plus a per-slot orientation lookup table:
+#     new_state[i] = orientation[i][state[permutation[i]]]
+# Slots sharing a table are gathered from one translated copy of the state, so
+# applying a move is a couple of C level calls instead of rebuilding 3x3 lists.
+IDENTITY_TABLE = bytes(range(256))
+
+
+class CompiledMove:
+    def __init__(self, name, permutation, orientation):
+        self.name = name
+        self.permutation = tuple(permutation)
+        # one 256 entry bytes.translate table per destination slot
+        self.orientation = tuple(orientation)
+        self.touched = tuple(
+            slot for slot in range(NUM_SLOTS)
+            if self.permutation[slot] != slot or self.orientation[slot] != IDENTITY_TABLE
+        )
+
+        # state + state.translate(t) for every distinct table t, indexed by the gather
+        tables = []
+        gather = []
+        for source, table in zip(self.permutation, self.orientation):
+            if table == IDENTITY_TABLE:
+                gather.append(source)
+                continue
+            if table not in tables:
+                tables.append(table)
+            gather.append(NUM_SLOTS * (tables.index(table) + 1) + source)
+        self._tables = tuple(tables)
+        self._sliced, self._gather = CompiledMove._compile_gather(gather)
+
+    def __repr__(self):
+        return f"CompiledMove({self.name!r})"
+
+    @staticmethod
+    def _compile_gather(gather):
+        # Consecutive destination slots whose sources step evenly through the buffer
+        # become one slice, so a turn of an x or y layer is six slices joined together.
+        # z layers are strided in memory and fall back to a per slot itemgetter.
+        slices = []
+        start = 0
+        while start < len(gather):
+            step = gather[start + 1] - gather[start] if start + 1 < len(gather) else 1
+            stop = start + 1
+            while step and stop < len(gather) and gather[stop] - gather[stop - 1] == step:
+                stop += 1
+            if stop - start == 1:
+                step = 1
+            source_stop = gather[start] + step * (stop - start)
+            slices.append(slice(gather[start], source_stop if source_stop >= 0 else None, step))
+            start = stop
+        if len(slices) <= 9:
+            # the empty slice keeps itemgetter returning a tuple even for a single run
+            return True, operator.itemgetter(*slices, slice(0, 0))
+        return False, operator.itemgetter(*gather)
+
+    def apply(self, state):
+        buffer = state
+        for table in self._tables:
+            buffer += state.translate(table)
+        if self._sliced:
+            return b''.join(self._gather(buffer))
+        return bytes(self._gather(buffer))
+
+    # algebra: a compiled move is a permutation plus one code table per slot, and so is
+    # any sequence of them, so algorithms fuse into a single move that applies in one call
+
+    def then(self, other):
+        """
+        The compiled move that applies self and then other.
+        """
+        # other reads slot other.permutation[i] of self's output, which came from
+        # self.permutation[other.permutation[i]] through self's table for that slot
+        permutation = [self.permutation[source] for source in other.permutation]
+        orientation = [
+            self.orientation[source].translate(table)
+            for source, table in zip(other.permutation, other.orientation)
+        ]
+        return CompiledMove(f"{self.name} {other.name}".strip(), permutation, orientation)
+
+    def inverse(self):
+        """
+        The compiled move that undoes self.
+        """
+        permutation = [0] * NUM_SLOTS
+        for slot, source in enumerate(self.permutation):
+            permutation[source] = slot
+        orientation = []
+        for slot in range(NUM_SLOTS):
+            table = self.orientation[permutation[slot]]
+            if len(set(table)) != len(table):
+                raise ValueError(f"{self!r} loses information in slot {slot} and has no inverse")
+            inverse_table = bytearray(len(table))
+            for code, new_code in enumerate(table):
+                inverse_table[new_code] = code
+            orientation.append(bytes(inverse_table))
+        return CompiledMove(f"({self.name})'", permutation, orientation)
+
+    def power(self, k):
+        """
+        self applied k times, by repeated squaring; negative k repeats the inverse.
+        """
+        if k < 0:
+            result = self.inverse().power(-k)
+            result.name = f"({self.name}){k}"
+            return result
+        k_total = k
+        result = identity_move()
+        square = self
+        while k:
+            if k & 1:
+                result = result.then(square)
+            k >>= 1
+            if k:
+                square = square.then(square)
+        result.name = f"({self.name}){k_total}"
+        return result
+
+    def order(self):
+        """
+        The smallest k > 0 for which self applied k times changes nothing.
+        """
+        order = 1
+        seen = set()
+        for start in range(NUM_SLOTS):
+            if start in seen:
+                continue
+            # going once round a cycle of slots composes its tables into one code
+            # permutation, which then needs its own order of trips round the cycle
+            cycle = []
+            slot = start
+            while slot not in seen:
+                seen.add(slot)
+                cycle.append(slot)
+                slot = self.permutation[slot]
+            table = IDENTITY_TABLE
+            for slot in reversed(cycle):
+                table = table.translate(self.orientation[slot])
+            order = math.lcm(order, len(cycle) * _table_order(table))
+        return order
+
+    def is_identity(self):
+        return not self.touched
+
+
+def _table_order(table):
+    # the order of a code table as a permutation of the 256 codes
+    if len(set(table)) != len(table):
+        raise ValueError("Code table is not a permutation, so it has no order")
+    order = 1
+    seen = set()
+    for start in range(len(table)):
+        length = 0
+        code = start
+        while code not in seen:
+            seen.add(code)
+            code = table[code]
+            length += 1
+        if length:
+            order = math.lcm(order, length)
+    return order
+
+
+def _probe_cube(pieces):
+    probe = CubixTube()
+    probe.cube = [[[pieces[slot_index(x, y, z)] for z in range(3)] for y in range(3)] for x in range(3)]
+    return probe
+
+
+def compile_move(move_name):
+    """
+    Compile a CubixTube move into a CompiledMove by running the method on probe cubes.
+
+    The permutation is read off by tracking 27 distinct piece objects, and the
+    orientation tables by running the move once per slot code on a cube filled with that code.
+    """
+    markers = [CornerPiece("Red", 1) for _ in range(NUM_SLOTS)]
+    probe = _probe_cube(markers)
+    getattr(probe, move_name)()
+    marker_slots = {id(piece): slot for slot, piece in enumerate(markers)}
+    permutation = [marker_slots[id(piece)] for layer in probe.cube for row in layer for piece in row]
+
+    orientation = [bytearray(IDENTITY_TABLE) for _ in range(NUM_SLOTS)]
+    for code in range(NUM_SLOT_CODES):
+        probe = _probe_cube([decode_slot(code) for _ in range(NUM_SLOTS)])
+        getattr(probe, move_name)()
+        for slot, new_code in enumerate(encode_cube_state(probe.cube)):
+            orientation[slot][code] = new_code
+
+    return CompiledMove(move_name, permutation, [bytes(table) for table in orientation])
+
+
+_MOVE_TABLES = None
+
+
+def move_tables():
+    """
+    Compiled tables for every move in move_pairs, built on first use.
+    """
+    global _MOVE_TABLES
+    if _MOVE_TABLES is None:
+        _MOVE_TABLES = {move_name: compile_move(move_name) for move_name in move_pairs}
+    return _MOVE_TABLES
+
+
+def apply_compiled_move(state, move_name):
+    return move_tables()[move_name].apply(state)
+
+def identity_move():
+    return CompiledMove("", range(NUM_SLOTS), [IDENTITY_TABLE] * NUM_SLOTS)
+
+
+def compile_sequence(moves, name=None):
+    """
+    Fuse a sequence of moves into one CompiledMove, so replaying it costs a single move.
+
+    Args:
+        moves: Move names or CompiledMoves, applied left to right.
+        name: Name for the result; defaults to the move names joined by spaces.
+
+    Returns:
+        A CompiledMove equal to applying the moves one after another.
+    """
+    tables = move_tables()
+    compiled = [tables[move] if isinstance(move, str) else move for move in moves]
+    # fuse neighbours pairwise so the intermediate names and tables stay balanced
+    while len(compiled) > 1:
+        fused = [first.then(second) for first, second in zip(compiled[::2], compiled[1::2])]
+        if len(compiled) % 2:
+            fused.append(compiled[-1])
+        compiled = fused
+    result = compiled[0] if compiled else identity_move()
+    if name is not None:
+        result.name = name
+    return result
+
+
+# batched moves:
+# With NumPy, a whole frontier is moved at once instead of one state per call.  N states
+# are an (N, 27) uint8 array, one encoded state per row, and a move is the permutation and
+# orientation lookup of its CompiledMove done by fancy indexing over every row:
+#     new_states[:, i] = orientation[i][states[:, permutation[i]]]
+# The orientation tables of all the moves sit in one flat array, so the children of a
+# frontier under every move come out of a single lookup.  NumPy is optional; everything
+# else in this file runs without it.
+
+_NUMPY_CHECKED = False
+
+
+def _numpy_available():
+    # imports NumPy into np the first time something asks for it
+    global np, _NUMPY_CHECKED
+    if not _NUMPY_CHECKED:
+        _NUMPY_CHECKED = True
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+    return np is not None
+
+
+def _require_numpy():
+    if not _numpy_available():
+        raise ImportError("The batched move engine needs NumPy")
+
+
+def states_to_array(states):
+    """
+    Stack encoded states into an (N, 27) uint8 array.
+    """
+    _require_numpy()
+    return np.frombuffer(bytearray(b''.join(states)), dtype=np.uint8).reshape(-1, NUM_SLOTS)
+
+
+def array_to_states(states):
+    """
+    The rows of an (N, 27) state array as encoded states.
+    """
+    _require_numpy()
+    data = np.ascontiguousarray(states, dtype=np.uint8).tobytes()
+    return [data[offset:offset + NUM_SLOTS] for offset in range(0, len(data), NUM_SLOTS)]
+
+
+def unique_states(states):
+    """
+    The distinct rows of an (N, 27) state array, sorted by their bytes.
+    """
+    _require_numpy()
+    rows = np.ascontiguousarray(states, dtype=np.uint8).view(np.dtype((np.void, NUM_SLOTS))).ravel()
+    return np.unique(rows).view(np.uint8).reshape(-1, NUM_SLOTS)
+
+
+class BatchMoves:
+    def __init__(self, moves=None):
+        """
+        Args:
+            moves: Move names, in the order children are generated; defaults to every move in move_pairs.
+        """
+        _require_numpy()
+        self.moves = tuple(move_pairs if moves is None else moves)
+        self.index = {move_name: index for index, move_name in enumerate(self.moves)}
+        compiled_moves = [move_tables()[move_name] for move_name in self.moves]
+        self.permutations = np.array([move.permutation for move in compiled_moves], dtype=np.intp).reshape(-1, NUM_SLOTS)
+        self._tables = np.frombuffer(b''.join(b''.join(move.orientation) for move in compiled_moves), dtype=np.uint8)
+        # start of the 256 entry table of every (move, destination slot) in _tables
+        self._offsets = (np.arange(len(self.moves))[:, None] * NUM_SLOTS + np.arange(NUM_SLOTS)) * len(IDENTITY_TABLE)
+
+    def __repr__(self):
+        return f"BatchMoves({len(self.moves)} moves)"
+
+    def apply(self, states, move_name):
+        """
+        Apply one move to every row of an (N, 27) state array.
+        """
+        index = self.index[move_name]
+        return self._tables[self._offsets[index] + states[:, self.permutations[index]]]
+
+    def children(self, states):
+        """
+        Every move applied to every row of an (N, 27) state array.
+
+        Returns:
+            An (N * M, 27) array; row k is the state of row k // M after move k % M.
+        """
+        return self._tables[self._offsets + states[:, self.permutations]].reshape(-1, NUM_SLOTS)
+
+
+def batch_bfs(start_state, moves=None, max_depth=None):
+    """
+    In-memory breadth-first search that expands each layer with BatchMoves.
+
+    As in external_bfs, a move set closed under inverses only needs the two previous
+    layers to drop duplicates; otherwise every layer is kept.
+
+    Yields:
+        Each layer as a sorted (N, 27) state array, starting with the start state at depth 0.
+    """
+    batch = BatchMoves(moves)
+    keep_all = not _closed_under_inverses(batch.moves)
+    void = np.dtype((np.void, NUM_SLOTS))
+    layer = states_to_array([start_state])
+    previous = [layer.view(void).ravel()]
+    depth = 0
+    while len(layer):
+        yield layer
+        if max_depth is not None and depth == max_depth:
+            return
+        candidates = unique_states(batch.children(layer)).view(void).ravel()
+        for seen in previous:
+            candidates = np.setdiff1d(candidates, seen, assume_unique=True)
+        previous = (previous if keep_all else previous[-1:]) + [candidates]
+        layer = candidates.view(np.uint8).reshape(-1, NUM_SLOTS)
+        depth += 1
+
+
+# whole-puzzle symmetries:
+# A symmetry moves every piece to the mirrored or rotated slot and rewrites its code:
+# colors are permuted and orientations remapped.  It is a CompiledMove whose
+# orientation table is the same for every slot.  What makes it a symmetry is that it
+# conjugates the move set onto itself, S M S^-1 = M', so S maps a solution of x onto a
+# solution of S(x) of the same length.  Candidates are the axis swaps and flips that
+# keep the Blue Center slot (1, 1, 0) in place.  Their orientation remaps are solved
+# from the move tables, so nothing depends on what the 12 orientation codes look like.
+BLUE_CENTER_SLOT = slot_index(1, 1, 0)
+
+
+def _slot_symmetries():
+    # (name, sigma) where the piece in slot i moves to slot sigma[i]
+    candidates = []
+    for axes in itertools.permutations(range(3)):
+        for flips in itertools.product((False, True), repeat=3):
+            sigma = []
+            for x in range(3):
+                for y in range(3):
+                    for z in range(3):
+                        coordinates = [0, 0, 0]
+                        for axis, value in enumerate((x, y, z)):
+                            coordinates[axes[axis]] = 2 - value if flips[axis] else value
+                        sigma.append(slot_index(*coordinates))
+            if sigma[BLUE_CENTER_SLOT] == BLUE_CENTER_SLOT:
+                name = "xyz"[axes[0]] + "xyz"[axes[1]] + "xyz"[axes[2]] + "".join("-" if flip else "+" for flip in flips)
+                candidates.append((name, sigma))
+    return candidates
+
+
+def _orientation_remaps(move_pairs_to_match, code_base):
+    """
+    Every orientation bijection tau with tau(T(o)) == T'(tau(o)) for each (T, T') table pair.
+
+    Orientations are solved orbit by orbit; orientations that no move ever changes
+    (the straight codes past 3) are kept as they are.
+    """
+    def step(table, orientation):
+        return table[code_base + orientation] - code_base
+
+    orbits = []
+    seen = set()
+    for orientation in range(NUM_ORIENTATIONS):
+        if orientation in seen:
+            continue
+        orbit = {orientation}
+        stack = [orientation]
+        while stack:
+            current = stack.pop()
+            for table, _ in move_pairs_to_match:
+                following = step(table, current)
+                if following not in orbit:
+                    orbit.add(following)
+                    stack.append(following)
+        seen |= orbit
+        orbits.append(sorted(orbit))
+
+    remaps = [{}]
+    for orbit in orbits:
+        if len(orbit) == 1 and all(step(table, orbit[0]) == orbit[0] for table, _ in move_pairs_to_match):
+            remaps = [{**remap, orbit[0]: orbit[0]} for remap in remaps if orbit[0] not in remap.values()]
+            continue
+        extended = []
+        for remap in remaps:
+            for image in range(NUM_ORIENTATIONS):
+                tau = dict(remap)
+                if image in tau.values():
+                    continue
+                tau[orbit[0]] = image
+                stack = [orbit[0]]
+                consistent = True
+                while stack and consistent:
+                    current = stack.pop()
+                    for table, matched_table in move_pairs_to_match:
+                        following, following_image = step(table, current), step(matched_table, tau[current])
+                        if following in tau:
+                            consistent = tau[following] == following_image
+                        elif following_image in tau.values():
+                            consistent = False
+                        else:
+                            tau[following] = following_image
+                            stack.append(following)
+                        if not consistent:
+                            break
+                if consistent:
+                    extended.append(tau)
+        remaps = extended
+    return [tuple(remap[orientation] for orientation in range(NUM_ORIENTATIONS)) for remap in remaps]
+
+
+def puzzle_symmetries(moves=None):
+    """
+    Enumerate the whole-puzzle symmetries of a move set, combined with every recoloring.
+
+    Each candidate is checked by conjugating every move with it on probe states; only the
+    ones that map the move set onto itself are returned.  The identity comes first.
+
+    Args:
+        moves: Move names the symmetries must preserve; defaults to every move in move_pairs.
+
+    Returns:
+        A list of CompiledMove objects, one per symmetry.
+    """
+    if moves is None:
+        moves = list(move_pairs)
+    tables = move_tables()
+    symmetries = []
+    for slot_name, sigma in _slot_symmetries():
+        gather = [sigma.index(slot) for slot in range(NUM_SLOTS)]
+        # the move that each move becomes under sigma, found by its permutation
+        matched = {}
+        for move_name in moves:
+            permutation = tables[move_name].permutation
+            conjugated = [None] * NUM_SLOTS
+            for slot in range(NUM_SLOTS):
+                conjugated[sigma[slot]] = sigma[permutation[slot]]
+            matched[move_name] = [other for other in moves if list(tables[other].permutation) == conjugated]
+        if not all(matched.values()):
+            continue
+
+        remaps = {}
+        for piece_class, code_base in ((CornerPiece, CORNER_CODE_BASE), (StraightPiece, STRAIGHT_CODE_BASE)):
+            # every slot a move touches uses the same table, so one per move is enough
+            table_pairs = [
+                (tables[move_name].orientation[tables[move_name].touched[0]],
+                 tables[other].orientation[tables[other].touched[0]])
+                for move_name in moves for other in matched[move_name][:1]
+            ]
+            remaps[piece_class] = _orientation_remaps(table_pairs, code_base)
+
+        for corner_remap, straight_remap in itertools.product(remaps[CornerPiece], remaps[StraightPiece]):
+            for colors in itertools.permutations(PIECE_COLORS):
+                recolor = dict(zip(PIECE_COLORS, colors))
+                table = bytearray(IDENTITY_TABLE)
+                for code in range(CORNER_CODE_BASE, NUM_SLOT_CODES):
+                    piece = FROZEN_PIECES[code]
+                    remap = corner_remap if piece.piece_class is CornerPiece else straight_remap
+                    table[code] = encode_slot(piece.piece_class(recolor[piece.color], remap[piece.orientation - 1] + 1))
+                color_name = "".join(color[0] for color in colors)
+                symmetry = CompiledMove(f"{slot_name}/{color_name}/{len(symmetries)}", gather, [bytes(table)] * NUM_SLOTS)
+                if all(
+                    any(_transform_signature(lambda state: symmetry.apply(tables[move_name].apply(state)))
+                        == _transform_signature(lambda state: tables[other].apply(symmetry.apply(state)))
+                        for other in matched[move_name])
+                    for move_name in moves
+                ):
+                    symmetries.append(symmetry)
+    return symmetries
+
+
+def goal_symmetries(goal_state, moves=None, symmetries=None):
+    """
+    The symmetries that leave goal_state unchanged.  Only these may be used to merge
+    states while searching for goal_state, since they keep every distance to the goal.
+    """
+    if symmetries is None:
+        symmetries = puzzle_symmetries(moves)
+    return [symmetry for symmetry in symmetries if symmetry.apply(goal_state) == goal_state]
+
+
+def symmetric_goal(state, symmetries):
+    """
+    A goal close to state that some of symmetries leave unchanged: each slot cycle of one
+    symmetry carries its last code round through the symmetry's table, and cycles where
+    that does not close up are emptied.  The solved state has no goal symmetry besides
+    the identity, so the symmetry tests need a goal like this.
+
+    Returns:
+        A tuple of (goal state, its goal_symmetries).
+    """
+    best = None
+    for symmetry in symmetries:
+        goal = bytearray(state)
+        # symmetry maps slot permutation[i] to slot i through one table, so a fixed state
+        # carries a code round each slot cycle; cycles where state does not close are emptied
+        seen = set()
+        for start in range(NUM_SLOTS):
+            cycle = []
+            slot = start
+            while slot not in seen:
+                seen.add(slot)
+                cycle.append(slot)
+                slot = symmetry.permutation[slot]
+            if not cycle:
+                continue
+            table = symmetry.orientation[cycle[0]]
+            codes = [state[cycle[-1]]]
+            for slot in reversed(cycle[:-1]):
+                codes.append(table[codes[-1]])
+            codes.reverse()
+            if table[codes[0]] != codes[-1]:
+                codes = [0] * len(cycle)
+            for slot, code in zip(cycle, codes):
+                goal[slot] = code
+        goal = bytes(goal)
+        fixing = [other for other in symmetries if other.apply(goal) == goal]
+        rank = (sum(code != 0 for code in goal), len(fixing))
+        if best is None or rank > best[0]:
+            best = rank, goal, fixing
+    return best[1], best[2]
+
+
+def canonical_state(state, symmetries):
+    """
+    The smallest image of state under symmetries, the same for every state in its class.
+    """
+    return min(symmetry.apply(state) for symmetry in symmetries)
+
+
+# solvability:
+# Invariants of a move set, read off its compiled tables, that let a start state which can
+# never reach the goal be rejected before any search is launched:
+#   piece classes - a piece can only visit the (slot, code) pairs the moves connect to where
+#       it started, so how many pieces sit in each class never changes.  That covers the
+#       count of every piece type and color and the orientations a piece can take in a slot.
+#   permutation parity - in a slot orbit whose pieces all have different classes, the parity
+#       of the permutation from the goal has to be one the moves can produce.
+#   orientation sums - weights w[slot][code] whose total over the state no move changes,
+#       mod 2 and mod 3 (the primes of the 12 orientations), found as a null space.
+SOLVABILITY_MODULI = (2, 3)
+
+
+def _insert_row_mod(pivots, row, p):
+    """
+    Reduce row, a {variable: coefficient} dict, by the echelon rows in pivots (mod p) and add
+    what is left as a new pivot row.
+
+    Returns:
+        True if the row was independent of pivots.
+    """
+    row = {var: coefficient % p for var, coefficient in row.items() if coefficient % p}
+    while row:
+        var = min(row)
+        if var not in pivots:
+            scale = pow(row[var], p - 2, p)
+            pivots[var] = {v: coefficient * scale % p for v, coefficient in row.items()}
+            return True
+        factor = row[var]
+        for v, coefficient in pivots[var].items():
+            value = (row.get(v, 0) - factor * coefficient) % p
+            if value:
+                row[v] = value
+            else:
+                row.pop(v, None)
+    return False
+
+
+def _nullspace_mod(rows, num_vars, p):
+    """
+    A basis of the x with row . x = 0 (mod p) for every row, as {variable: value} dicts.
+    """
+    pivots = {}
+    for row in rows:
+        _insert_row_mod(pivots, row, p)
+    # every other variable in a pivot row is larger, so solve from the last pivot back
+    order = sorted(pivots, reverse=True)
+    basis = []
+    for free in range(num_vars):
+        if free in pivots:
+            continue
+        x = {free: 1}
+        for var in order:
+            value = -sum(coefficient * x.get(v, 0) for v, coefficient in pivots[var].items() if v != var) % p
+            if value:
+                x[var] = value
+        basis.append(x)
+    return basis
+
+
+def _parity(permutation):
+    # permutation as a dict; parity is the number of even length cycles mod 2
+    seen = set()
+    parity = 0
+    for start in permutation:
+        length = 0
+        item = start
+        while item not in seen:
+            seen.add(item)
+            item = permutation[item]
+            length += 1
+        if length and not length % 2:
+            parity ^= 1
+    return parity
+
+
+class SolvabilityCheck:
+    """
+    The invariants of moves around goal_state.  States failing any of them cannot be
+    solved with these moves; states passing all of them may still be unsolvable.
+    """
+
+    def __init__(self, goal_state, moves):
+        self.goal_state = goal_state
+        self.moves = tuple(moves)
+        compiled_moves = [move_tables()[move_name] for move_name in moves]
+        # where each move sends the piece in each slot
+        destinations = []
+        for move in compiled_moves:
+            destination = [0] * NUM_SLOTS
+            for slot, source in enumerate(move.permutation):
+                destination[source] = slot
+            destinations.append(destination)
+
+        # piece classes, numbered from 1 so that 0 marks a pair no goal piece can reach
+        piece_class = {}
+        for node in enumerate(goal_state):
+            if node in piece_class:
+                continue
+            label = len(set(piece_class.values())) + 1
+            piece_class[node] = label
+            stack = [node]
+            while stack:
+                slot, code = stack.pop()
+                for move, destination in zip(compiled_moves, destinations):
+                    new_slot = destination[slot]
+                    new_node = (new_slot, move.orientation[new_slot][code])
+                    if new_node not in piece_class:
+                        piece_class[new_node] = label
+                        stack.append(new_node)
+        class_tables = [bytearray(NUM_SLOT_CODES) for _ in range(NUM_SLOTS)]
+        for (slot, code), label in piece_class.items():
+            class_tables[slot][code] = label
+        self.classes = SlotHeuristic(class_tables)
+        goal_classes = self.classes.contributions(goal_state)
+        self.goal_class_counts = sorted(goal_classes)
+
+        # slot orbits, and the parities the moves can make in the ones with distinct pieces
+        orbit_of = list(range(NUM_SLOTS))
+        for destination in destinations:
+            for slot, new_slot in enumerate(destination):
+                old, new = orbit_of[new_slot], orbit_of[slot]
+                orbit_of = [new if orbit == old else orbit for orbit in orbit_of]
+        orbits = {}
+        for slot, orbit in enumerate(orbit_of):
+            orbits.setdefault(orbit, []).append(slot)
+        self.labelled_orbits = [
+            tuple(slots) for slots in orbits.values()
+            if len(slots) > 1 and len({goal_classes[slot] for slot in slots}) == len(slots)
+        ]
+        self.goal_positions = {goal_classes[slot]: slot for slots in self.labelled_orbits for slot in slots}
+        self.parities = {0}
+        for destination in destinations:
+            mask = sum(_parity({slot: destination[slot] for slot in slots}) << index
+                       for index, slots in enumerate(self.labelled_orbits))
+            self.parities |= {parity ^ mask for parity in self.parities}
+
+        # orientation sums: w[new node] - w[node] = a[move][slot] for every node, and the
+        # a of a move sum to 0, so the move leaves the total unchanged
+        nodes = sorted(piece_class)
+        node_var = {node: var for var, node in enumerate(nodes)}
+        num_vars = len(nodes) + len(compiled_moves) * NUM_SLOTS
+        rows = []
+        for index, (move, destination) in enumerate(zip(compiled_moves, destinations)):
+            offset = len(nodes) + index * NUM_SLOTS
+            for slot, code in nodes:
+                new_slot = destination[slot]
+                new_var = node_var[(new_slot, move.orientation[new_slot][code])]
+                row = {offset + slot: -1}
+                row[new_var] = row.get(new_var, 0) + 1
+                row[node_var[(slot, code)]] = row.get(node_var[(slot, code)], 0) - 1
+                rows.append(row)
+            rows.append({offset + slot: 1 for slot in range(NUM_SLOTS)})
+        self.sums = []
+        for p in SOLVABILITY_MODULI:
+            # weights that only count pieces per class, or add a constant per slot, tell nothing new
+            trivial = {}
+            for label in set(piece_class.values()):
+                _insert_row_mod(trivial, {node_var[node]: 1 for node in nodes if piece_class[node] == label}, p)
+            for slot in range(NUM_SLOTS):
+                _insert_row_mod(trivial, {node_var[node]: 1 for node in nodes if node[0] == slot}, p)
+            for solution in _nullspace_mod(rows, num_vars, p):
+                weights = {var: value for var, value in solution.items() if var < len(nodes)}
+                if not _insert_row_mod(trivial, weights, p):
+                    continue
+                tables = [bytearray(NUM_SLOT_CODES) for _ in range(NUM_SLOTS)]
+                for var, value in weights.items():
+                    slot, code = nodes[var]
+                    tables[slot][code] = value
+                weight_heuristic = SlotHeuristic(tables)
+                self.sums.append((p, weight_heuristic, weight_heuristic.score(goal_state) % p))
+
+    def reason(self, state):
+        """
+        Why state cannot reach the goal, or None if it passes every invariant.
+        """
+        classes = self.classes.contributions(state)
+        if 0 in classes:
+            slot = classes.index(0)
+            return f"slot {slot} holds {_SLOT_CODE_TOKENS[state[slot]]}, which no goal piece can reach there"
+        if sorted(classes) != self.goal_class_counts:
+            return "the piece types, colors or orientation classes differ from the goal's"
+        mask = 0
+        for index, slots in enumerate(self.labelled_orbits):
+            mask |= _parity({self.goal_positions[classes[slot]]: slot for slot in slots}) << index
+        if mask not in self.parities:
+            return "the pieces are an odd permutation away from the goal where the moves only make even ones"
+        for p, weight_heuristic, goal_sum in self.sums:
+            state_sum = weight_heuristic.score(state) % p
+            if state_sum != goal_sum:
+                return f"an orientation sum is {state_sum} mod {p}, the goal's is {goal_sum}"
+        return None
+
+    def is_solvable(self, state):
+        return self.reason(state) is None
+
+
+_SOLVABILITY_CHECKS = {}
+
+
+def solvability_check(goal_state, moves):
+    """
+    The SolvabilityCheck for goal_state and moves, derived on first use.
+    """
+    key = (goal_state, tuple(moves))
+    if key not in _SOLVABILITY_CHECKS:
+        _SOLVABILITY_CHECKS[key] = SolvabilityCheck(goal_state, moves)
+    return _SOLVABILITY_CHECKS[key]
+
+
+# solution cache:
+# The same positions come up again and again, so solutions are cached under the
+# canonical compact state: an in-process LRU dict in front of an optional dbm file.
+# A key is a digest of the goal and move set followed by the canonical state, so one
+# file can serve several goals and move sets.  A value is the cost followed by the moves
+# as indices into move_pairs.  Storing a path also stores every state along it with the
+# rest of the path, since each of those is now solved as well.
+SOLUTION_CACHE_COST = struct.Struct('<I')
+SOLUTION_CACHE_MOVES = list(move_pairs)
+
+
+class SolutionCache:
+    def __init__(self, goal_state, moves, path=None, capacity=100000, symmetries=None):
+        """
+        Args:
+            goal_state: The encoded goal state the cached solutions reach.
+            moves: The move set of the solver the cache sits in front of.
+            path: A dbm file for the persistent tier, created if missing; memory only if None.
+            capacity: Entries kept in the in-process LRU tier.
+            symmetries: Optional goal_symmetries for moves.  States in the same class share
+                an entry, with the moves conjugated on the way in and out.
+        """
+        import hashlib
+
+        self.goal_state = goal_state
+        self.moves = tuple(moves)
+        self.capacity = capacity
+        self.symmetries = list(symmetries) if symmetries else [None]
+        self._prefix = hashlib.sha256(repr((goal_state, self.moves)).encode()).digest()[:8]
+        self._memory = {}  # key -> value, oldest first
+        self._move_maps = {}
+        self._disk = None
+        if path is not None:
+            import dbm
+            self._disk = dbm.open(path, "c")
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def _move_map(self, index):
+        # move -> the move it becomes under symmetry index: S(M(x)) == M'(S(x))
+        if index not in self._move_maps:
+            symmetry = self.symmetries[index]
+            tables = move_tables()
+            move_map = {}
+            for move_name in self.moves:
+                target = _transform_signature(lambda state: symmetry.apply(tables[move_name].apply(state)))
+                move_map[move_name] = next(
+                    other for other in self.moves
+                    if _transform_signature(lambda state: tables[other].apply(symmetry.apply(state))) == target
+                )
+            self._move_maps[index] = move_map
+        return self._move_maps[index]
+
+    def _key(self, state):
+        # the cache key of state and the index of the symmetry that makes it canonical
+        if self.symmetries[0] is None:
+            return self._prefix + state, None
+        canonical, index = min((symmetry.apply(state), index) for index, symmetry in enumerate(self.symmetries))
+        return self._prefix + canonical, index
+
+    def _get(self, key):
+        value = self._memory.pop(key, None)
+        if value is not None:
+            self.memory_hits += 1
+        elif self._disk is not None and key in self._disk:
+            value = self._disk[key]
+            self.disk_hits += 1
+        else:
+            return None
+        self._put_memory(key, value)
+        return value
+
+    def _put_memory(self, key, value):
+        self._memory[key] = value
+        if len(self._memory) > self.capacity:
+            del self._memory[next(iter(self._memory))]
+
+    def lookup(self, state):
+        """
+        The cached solution of an encoded state.
+
+        Returns:
+            A tuple of (list of moves, cost), or None on a miss.
+        """
+        key, index = self._key(state)
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        (cost,) = SOLUTION_CACHE_COST.unpack_from(value)
+        path = [SOLUTION_CACHE_MOVES[move] for move in value[SOLUTION_CACHE_COST.size:]]
+        if index is not None:
+            inverse = {target: move_name for move_name, target in self._move_map(index).items()}
+            path = [inverse[move_name] for move_name in path]
+        return path, cost
+
+    def store(self, state, path):
+        """
+        Cache path as the solution of an encoded state, and its suffixes as the solutions of
+        the states along it.  An entry is only replaced by a cheaper one.
+        """
+        tables = move_tables()
+        for position in range(len(path) + 1):
+            suffix = path[position:]
+            key, index = self._key(state)
+            if index is not None:
+                move_map = self._move_map(index)
+                suffix = [move_map[move_name] for move_name in suffix]
+            existing = self._memory.get(key)
+            if existing is None and self._disk is not None and key in self._disk:
+                existing = self._disk[key]
+            if existing is None or SOLUTION_CACHE_COST.unpack_from(existing)[0] > len(suffix):
+                value = SOLUTION_CACHE_COST.pack(len(suffix)) + bytes(SOLUTION_CACHE_MOVES.index(move) for move in suffix)
+                self._memory.pop(key, None)
+                self._put_memory(key, value)
+                if self._disk is not None:
+                    self._disk[key] = value
+                self.stores += 1
+            if position < len(path):
+                state = tables[path[position]].apply(state)
+
+    def solve(self, solver, start_cube, **kwargs):
+        """
+        Answer from the cache, or run solver and cache what it finds.
+
+        Args:
+            solver: A solver taking (start_cube, goal_state_serialized, goal_cubix_tube, ...),
+                or bidirectional_search; it should use the cache's moves.
+            start_cube: An instance of CubixTube representing the starting state.
+            kwargs: Passed on to the solver.
+
+        Returns:
+            A list of moves from the start state to the goal state, or None.
+        """
+        start_state = encode_cube_state(start_cube.cube)
+        cached = self.lookup(start_state)
+        if cached is not None:
+            return cached[0]
+        goal_state_serialized = serialize_encoded_state(self.goal_state)
+        if solver is bidirectional_search:
+            path = solver(start_cube, goal_state_serialized, **kwargs)
+        else:
+            path = solver(start_cube, goal_state_serialized, decode_to_cubix_tube(self.goal_state), **kwargs)
+        if path is not None:
+            self.store(start_state, path)
+        return path
+
+    def stats(self):
+        """
+        Hit and miss counts, and the hit rate over all lookups.
+        """
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / (hits + self.misses) if hits + self.misses else 0.0,
+            "stores": self.stores,
+            "memory_entries": len(self._memory),
+        }
+
+
 def is_goal_state(current_state_serialized, goal_state_serialized):
     current_state = deserialize_cube_state(current_state_serialized)
     goal_state = deserialize_cube_state(goal_state_serialized)
@@ -1120,23 +3627,1427 @@ def test_move_inverse_pairs(cube, move_pairs):
             print(f"Test passed for {move_name}. Cube returned to its original state.")
 
 
-cubix_tube_solved = CubixTube()
-initialize_front_face_solved(cubix_tube_solved)
-initialize_middle_layer_solved(cubix_tube_solved)
-initialize_back_face_solved(cubix_tube_solved)
+def test_state_encoding(cube, num_random_moves=500):
+    """
+    Round-trip every state of a random walk through each encoding: encode_cube_state and
+    decode_cube_state, serialize_encoded_state and encode_serialized_state, and
+    pack_state and unpack_state.
+
+    Args:
+        cube: An instance of CubixTube to start from (it is not modified).
+        num_random_moves: Length of the random walk.
+    """
+    for code in range(NUM_SLOT_CODES):
+        if encode_slot(decode_slot(code)) != code:
+            print(f"Test failed for slot code {code}. It does not survive decode_slot and encode_slot.")
+            return
+
+    reference = decode_to_cubix_tube(encode_cube_state(cube.cube))
+    move_names = list(move_pairs)
+    for step in range(num_random_moves + 1):
+        state = encode_cube_state(reference.cube)
+        serialized_state = serialize_cube_state(reference.cube)
+        if not cubes_are_equal(decode_cube_state(state), reference.cube) or \
+                encode_cube_state(decode_cube_state(state)) != state:
+            print(f"Test failed at step {step}. encode_cube_state and decode_cube_state do not round-trip.")
+            return
+        if serialize_encoded_state(state) != serialized_state or encode_serialized_state(serialized_state) != state:
+            print(f"Test failed at step {step}. The serialized form does not round-trip.")
+            return
+        packed_state = pack_state(state)
+        if len(packed_state) != PACKED_STATE_SIZE or unpack_state(packed_state) != state:
+            print(f"Test failed at step {step}. pack_state and unpack_state do not round-trip.")
+            return
+        getattr(reference, random.choice(move_names))()
+    print(f"Test passed for {num_random_moves + 1} states. Every encoding round-trips.")
+
+
+def test_move_tables(cube, move_pairs, num_random_moves=500):
+    """
+    Differential test of the compiled move tables against the CubixTube methods.
+
+    Args:
+        cube: An instance of CubixTube to start from (it is not modified).
+        move_pairs: The moves to check.
+        num_random_moves: Length of the random walk compared move by move afterwards.
+    """
+    tables = move_tables()
+    state = encode_cube_state(cube.cube)
+
+    for move_name in move_pairs:
+        reference = decode_to_cubix_tube(state)
+        getattr(reference, move_name)()
+        if tables[move_name].apply(state) != encode_cube_state(reference.cube):
+            print(f"Test failed for {move_name}. Compiled move does not match the CubixTube method.")
+        else:
+            print(f"Test passed for {move_name}. Compiled move matches the CubixTube method.")
+
+    reference = decode_to_cubix_tube(state)
+    move_names = list(move_pairs)
+    for step in range(num_random_moves):
+        move_name = random.choice(move_names)
+        getattr(reference, move_name)()
+        state = tables[move_name].apply(state)
+        if state != encode_cube_state(reference.cube):
+            print(f"Random walk diverged at step {step} ({move_name}).")
+            return
+    print(f"Random walk of {num_random_moves} moves matched.")
+
 
-cubix_tube = CubixTube()
-initialize_front_face(cubix_tube)
-initialize_middle_layer(cubix_tube)
-initialize_back_face(cubix_tube)
+def test_compiled_sequences(cube, num_sequences=50, max_length=20):
+    """
+    Check compile_sequence and the CompiledMove algebra against applying moves one by one.
 
-# test_move_inverse_pairs(cubix_tube, move_pairs)
+    Args:
+        cube: An instance of CubixTube to start from (it is not modified).
+        num_sequences: How many random move sequences to fuse.
+        max_length: The longest sequence tried.
+    """
+    tables = move_tables()
+    state = encode_cube_state(cube.cube)
+    move_names = list(move_pairs)
+    for _ in range(num_sequences):
+        sequence = [random.choice(move_names) for _ in range(random.randint(0, max_length))]
+        fused = compile_sequence(sequence)
+        expected = state
+        for move_name in sequence:
+            expected = tables[move_name].apply(expected)
+        if fused.apply(state) != expected:
+            print(f"Test failed for {sequence}. Fused sequence does not match the moves.")
+            return
+        if fused.inverse().apply(expected) != state:
+            print(f"Test failed for {sequence}. Inverse does not undo the sequence.")
+            return
+        order = fused.order()
+        if not fused.power(order).is_identity() or fused.power(3).apply(state) != fused.apply(fused.apply(expected)):
+            print(f"Test failed for {sequence}. Power or order is wrong.")
+            return
+    print(f"Test passed for {num_sequences} fused sequences.")
+
+
+def test_incremental_heuristic(cube, goal_cubix_tube, num_random_moves=500):
+    """
+    Compare incremental rescoring against calculate_heuristic and calculate_heuristic_alpha
+    along a random walk, carrying the score and contributions from node to node.
+    """
+    goal_state = encode_cube_state(goal_cubix_tube.cube)
+    references = {
+        "calculate_heuristic": (calculate_heuristic, ()),
+        "calculate_heuristic_alpha": (calculate_heuristic_alpha, (orientation_matrix,)),
+    }
+    for name, (heuristic_function, args) in references.items():
+        heuristic = derive_slot_heuristic(goal_state, heuristic_function, *args)
+        state = encode_cube_state(cube.cube)
+        score = heuristic.score(state)
+        contributions = heuristic.contributions(state)
+        for step in range(num_random_moves):
+            move = move_tables()[random.choice(list(move_pairs))]
+            new_state = move.apply(state)
+            score = heuristic.rescore(score, contributions, move, new_state)
+            state = new_state
+            contributions = heuristic.contributions(state)
+            if score != heuristic_function(decode_cube_state(state), goal_cubix_tube.cube, *args):
+                print(f"Test failed for {name}: incremental score diverged at step {step} ({move.name}).")
+                break
+        else:
+            print(f"Test passed for {name}: {num_random_moves} incremental scores matched.")
 
-#path = a_star_search_alpha(cubix_tube, serialize_cube_state(cubix_tube_solved.cube), cubix_tube_solved)
-#path = a_star_search(cubix_tube, serialize_cube_state(cubix_tube_solved.cube), cubix_tube_solved)
-# let's try the other way:
-path = a_star_search(cubix_tube_solved, serialize_cube_state(cubix_tube.cube), cubix_tube)
-print(path)
+
+def test_batch_heuristics(cube, goal_cubix_tube, num_random_moves=500):
+    """
+    Compare calculate_heuristic_batch and calculate_heuristic_alpha_batch against the
+    scalar functions on every state of a random walk, scored as one batch.
+    """
+    states = [encode_cube_state(cube.cube)]
+    move_names = list(move_pairs)
+    for _ in range(num_random_moves):
+        states.append(move_tables()[random.choice(move_names)].apply(states[-1]))
+    cubes = [decode_cube_state(state) for state in states]
+    references = {
+        "calculate_heuristic": (calculate_heuristic, calculate_heuristic_batch, ()),
+        "calculate_heuristic_alpha": (calculate_heuristic_alpha, calculate_heuristic_alpha_batch, (orientation_matrix,)),
+    }
+    for name, (heuristic_function, batch_function, args) in references.items():
+        scores = batch_function(states_to_array(states), goal_cubix_tube.cube, *args).tolist()
+        for step, (cube_state, score) in enumerate(zip(cubes, scores)):
+            if score != heuristic_function(cube_state, goal_cubix_tube.cube, *args):
+                print(f"Test failed for {name}: batch score differs at step {step}.")
+                break
+        else:
+            print(f"Test passed for {name}: {len(states)} batch scores matched.")
+
+
+def test_batch_moves(cube, num_states=200, max_depth=4):
+    """
+    Compare BatchMoves against the compiled move tables on the states of a random walk, and
+    batch_bfs layer sizes against external_bfs.  Skipped without NumPy.
+
+    Args:
+        cube: An instance of CubixTube to start from (it is not modified).
+        num_states: Length of the random walk whose states are moved as one batch.
+        max_depth: Deepest breadth-first layer to compare.
+    """
+    import tempfile
+
+    if not _numpy_available():
+        print("NumPy is not installed; skipping the batched move engine.")
+        return
+    tables = move_tables()
+    states = [encode_cube_state(cube.cube)]
+    move_names = list(move_pairs)
+    while len(states) < num_states:
+        states.append(tables[random.choice(move_names)].apply(states[-1]))
+    batch = BatchMoves()
+    array = states_to_array(states)
+    for move_name in move_names:
+        if array_to_states(batch.apply(array, move_name)) != [tables[move_name].apply(state) for state in states]:
+            print(f"Test failed for {move_name}. BatchMoves.apply does not match the compiled move.")
+            return
+    expected_children = [tables[move_name].apply(state) for state in states for move_name in move_names]
+    if array_to_states(batch.children(array)) != expected_children:
+        print("Test failed: BatchMoves.children does not match the compiled moves.")
+        return
+
+    sizes = [len(layer) for layer in batch_bfs(states[0], FACE_MOVES, max_depth)]
+    with tempfile.TemporaryDirectory() as directory:
+        expected = external_bfs(directory, decode_to_cubix_tube(states[0]), FACE_MOVES, max_depth=max_depth)
+    if sizes != list(expected):
+        print(f"Test failed: batch_bfs layer sizes {sizes}, external_bfs {list(expected)}.")
+        return
+    print(f"Test passed: {len(move_names)} batched moves matched on {num_states} states, "
+          f"and batch_bfs layers {sizes} matched external_bfs.")
+
+
+def _check_optimal_paths(name, solve, goal_cubix_tube, moves=None, max_depth=4, seed=0, empty_scramble=False, bound=1):
+    """
+    Solve seeded_scrambles of goal_cubix_tube and check that every path reaches the goal in at
+    most bound times as many moves as breadth-first search (a_star_core with ZERO_HEURISTIC).
+
+    Args:
+        name: The solver named in the messages.
+        solve: Called as solve(start_cube, goal_state_serialized, goal_cubix_tube), or without
+            the goal cube for bidirectional_search; returns a list of moves or None.
+        goal_cubix_tube: The goal to solve scrambles of.
+        moves: Moves to scramble and search with; defaults to FACE_MOVES.
+        max_depth: One scramble of each depth from 1 to max_depth is solved.
+        seed: Seed for seeded_scrambles.
+        empty_scramble: Also solve the goal itself, which has to come back as an empty path.
+        bound: Allowed ratio to the shortest path length; None only checks the goal is reached.
+
+    Returns:
+        True if every path passed.
+    """
+    if moves is None:
+        moves = FACE_MOVES
+    goal_state = encode_cube_state(goal_cubix_tube.cube)
+    goal_state_serialized = serialize_encoded_state(goal_state)
+    scrambles = seeded_scrambles(goal_cubix_tube, moves, max_depth, seed)
+    if empty_scramble:
+        scrambles.insert(0, (0, decode_to_cubix_tube(goal_state)))
+    for depth, start_cube in scrambles:
+        start_state = encode_cube_state(start_cube.cube)
+        shortest = a_star_core(start_state, goal_state, moves, ZERO_HEURISTIC)
+        if solve is bidirectional_search:
+            path = solve(start_cube, goal_state_serialized)
+        else:
+            path = solve(start_cube, goal_state_serialized, goal_cubix_tube)
+        if path is None or CubeState(start_state).apply_moves(path) != goal_state:
+            print(f"Test failed for {name}: the path {path} from the depth {depth} scramble does not reach the goal.")
+            return False
+        if bound is not None and len(path) > bound * len(shortest):
+            print(f"Test failed for {name}: the path from the depth {depth} scramble has {len(path)} moves, "
+                  f"the shortest {len(shortest)}.")
+            return False
+    if bound is None:
+        print(f"Test passed for {name}: {len(scrambles)} paths reached the goal.")
+    elif bound == 1:
+        print(f"Test passed for {name}: {len(scrambles)} paths were shortest paths.")
+    else:
+        print(f"Test passed for {name}: {len(scrambles)} paths within {bound} times the shortest.")
+    return True
+
+
+def test_ida_star_search(goal_cubix_tube, max_depth=4, seed=0):
+    """
+    Check that ida_star_search finds shortest paths.
+    """
+    return _check_optimal_paths("ida_star_search", ida_star_search, goal_cubix_tube, max_depth=max_depth, seed=seed)
+
+
+def test_bidirectional_search(goal_cubix_tube, max_depth=4, seed=0):
+    """
+    Check that bidirectional_search finds shortest paths, including the empty one.
+    """
+    return _check_optimal_paths("bidirectional_search", bidirectional_search, goal_cubix_tube, max_depth=max_depth,
+                                seed=seed, empty_scramble=True)
+
+
+def test_hda_star_search(goal_cubix_tube, workers=2, max_depth=4, seed=0):
+    """
+    Check that hda_star_search finds shortest paths with several worker processes.
+    """
+    return _check_optimal_paths(f"hda_star_search with {workers} workers",
+                                lambda *args: hda_star_search(*args, workers=workers), goal_cubix_tube,
+                                max_depth=max_depth, seed=seed)
+
+
+def test_staged_solve(goal_cubix_tube, max_depth=4, seed=0):
+    """
+    Check that the simplified paths of staged_solve reach the goal.  The phases need not find
+    shortest paths, so only that is checked.
+    """
+    def solve(start_cube, goal_state_serialized, goal_cubix_tube):
+        return staged_solve(start_cube, goal_cubix_tube)[0]
+
+    return _check_optimal_paths("staged_solve", solve, goal_cubix_tube, max_depth=max_depth, seed=seed, bound=None)
+
+
+def test_ara_star_search(goal_cubix_tube, weight=2, max_depth=4, seed=0):
+    """
+    Check that the last ara_star_search path, at bound 1, is a shortest path, and that weighted
+    a_star_search_alpha stays within weight times the shortest path with the admissible red
+    layer pattern databases.
+    """
+    def solve(start_cube, goal_state_serialized, goal_cubix_tube):
+        paths = [path for path, bound in ara_star_search(start_cube, goal_state_serialized, goal_cubix_tube)
+                 if bound == 1]
+        return paths[-1] if paths else None
+
+    if not _check_optimal_paths("ara_star_search", solve, goal_cubix_tube, max_depth=max_depth, seed=seed):
+        return False
+    goal_state = encode_cube_state(goal_cubix_tube.cube)
+    heuristic = open_pattern_databases(red_layer_pattern_databases(goal_state, FACE_MOVES))
+    return _check_optimal_paths(f"a_star_search_alpha with weight {weight}",
+                                lambda *args: a_star_search_alpha(*args, heuristic=heuristic, weight=weight),
+                                goal_cubix_tube, max_depth=max_depth, seed=seed, bound=weight)
+
+
+def test_beam_search(goal_cubix_tube, max_depth=3, seed=0):
+    """
+    Check that beam_search and random_restart_search paths reach the goal from shallow
+    scrambles.  Neither promises a shortest path, so only that is checked.
+    """
+    if not _check_optimal_paths("beam_search", beam_search, goal_cubix_tube, max_depth=max_depth, seed=seed,
+                                bound=None):
+        return False
+    return _check_optimal_paths("random_restart_search", random_restart_search, goal_cubix_tube,
+                                max_depth=max_depth, seed=seed, bound=None)
+
+
+def test_external_search(goal_cubix_tube, max_depth=4, seed=0):
+    """
+    Check external_bfs layer sizes against an in-memory breadth-first search, and
+    external_a_star_search paths against the shortest ones, with a RAM budget small enough
+    that layers and buckets are sorted in several runs.
+
+    Args:
+        goal_cubix_tube: The state the layers start from and the scrambles return to.
+        max_depth: Deepest layer to compare, and the longest scramble.
+        seed: Seed for the scrambles.
+    """
+    import tempfile
+
+    moves = FACE_MOVES
+    compiled_moves = [move_tables()[move_name] for move_name in moves]
+    goal_state = encode_cube_state(goal_cubix_tube.cube)
+    ram_budget = 1000 * EXTERNAL_RECORD_BYTES
+
+    layers = [{goal_state}]
+    seen = {goal_state}
+    while len(layers) <= max_depth:
+        layer = {move.apply(state) for state in layers[-1] for move in compiled_moves} - seen
+        seen |= layer
+        layers.append(layer)
+    expected = [len(layer) for layer in layers]
+    with tempfile.TemporaryDirectory() as directory:
+        sizes = external_bfs(directory, goal_cubix_tube, moves, ram_budget, max_depth)
+    if list(sizes) != expected:
+        print(f"Test failed: external_bfs layer sizes {list(sizes)}, expected {expected}.")
+        return False
+    print(f"Test passed: external_bfs layers {expected}.")
+
+    def solve(start_cube, goal_state_serialized, goal_cubix_tube):
+        # a fresh directory per search, so no buckets are left over from the last one
+        with tempfile.TemporaryDirectory() as directory:
+            return external_a_star_search(start_cube, goal_state_serialized, goal_cubix_tube, directory, moves,
+                                          ram_budget=ram_budget)
+
+    return _check_optimal_paths("external_a_star_search", solve, goal_cubix_tube, moves, max_depth, seed)
+
+
+def test_checkpoint_resume(goal_cubix_tube, depth=4, num_pops=2000, seed=0):
+    """
+    Stop a breadth-first a_star_core run partway, checkpoint it with write_checkpoint, and
+    check that read_checkpoint gives back the same open heap, g scores, came_from links and
+    closed set, and that resume_a_star_search finishes with a path as short as an
+    uninterrupted run.
+
+    Args:
+        goal_cubix_tube: The goal to search for.
+        depth: Depth of the seeded scramble searched from.
+        num_pops: Heap pops before the search is stopped.
+        seed: Seed for seeded_scrambles.
+    """
+    import tempfile
+
+    moves = FACE_MOVES
+    goal_state = encode_cube_state(goal_cubix_tube.cube)
+    start_state = encode_cube_state(seeded_scrambles(goal_cubix_tube, moves, depth, seed)[-1][1].cube)
+    shortest = a_star_core(start_state, goal_state, moves, ZERO_HEURISTIC)
+
+    # the search runs on structures owned here, and a goal test that stops it after num_pops
+    # pops; the state popped last was never expanded, so it goes back on the heap
+    open_set, g_score, came_from, closed_set = [(0, 0, start_state)], {start_state: 0}, {}, set()
+    popped = []
+
+    def pause(state):
+        popped.append(state)
+        return len(popped) > num_pops
+
+    a_star_core(start_state, goal_state, moves, ZERO_HEURISTIC, resume=(open_set, g_score, came_from, closed_set),
+                is_goal=pause)
+    if len(popped) <= num_pops or goal_state in closed_set:
+        print(f"Test failed: the search ended before {num_pops} pops; use a deeper scramble.")
+        return False
+    heapq.heappush(open_set, (g_score[popped[-1]], g_score[popped[-1]], popped[-1]))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "search.ckpt")
+        write_checkpoint(path, "a_star_search_alpha", moves, None, start_state, goal_state,
+                         open_set, g_score, came_from, closed_set)
+        checkpoint = read_checkpoint(path)
+        if checkpoint["resume"] != (open_set, g_score, came_from, closed_set) or \
+                (checkpoint["start_state"], checkpoint["goal_state"]) != (start_state, goal_state):
+            print("Test failed: read_checkpoint does not give back the search that was written.")
+            return False
+        resumed_path = resume_a_star_search(path, heuristic=ZERO_HEURISTIC)
+    if resumed_path is None or CubeState(start_state).apply_moves(resumed_path) != goal_state:
+        print(f"Test failed: the resumed path {resumed_path} does not reach the goal.")
+        return False
+    if len(resumed_path) != len(shortest):
+        print(f"Test failed: the resumed path has {len(resumed_path)} moves, the uninterrupted one {len(shortest)}.")
+        return False
+    print(f"Test passed: a search checkpointed after {num_pops} pops read back intact and resumed to a "
+          f"{len(resumed_path)} move path.")
+    return True
+
+
+def test_solvability_check(goal_cubix_tube, num_random_moves=2000, seed=0):
+    """
+    Check solvability_check never rejects a state reached by random moves from the goal,
+    for the face moves, the slice moves and every move, and that it rejects the demo
+    configuration as a start for the solved state.
+
+    Args:
+        goal_cubix_tube: The goal the random walks start from.
+        num_random_moves: Length of the random walk per move set.
+        seed: Seed for the walks.
+    """
+    goal_state = encode_cube_state(goal_cubix_tube.cube)
+    rng = random.Random(seed)
+    for moves in (FACE_MOVES, SLICE_MOVES, list(move_pairs)):
+        check = solvability_check(goal_state, moves)
+        compiled_moves = [move_tables()[move_name] for move_name in moves]
+        state = goal_state
+        for step in range(num_random_moves):
+            state = rng.choice(compiled_moves).apply(state)
+            reason = check.reason(state)
+            if reason is not None:
+                print(f"Test failed: step {step} of a random walk was rejected: {reason}")
+                return
+    solved_state = encode_cube_state(solved_cubix_tube().cube)
+    if solvability_check(solved_state, FACE_MOVES).is_solvable(encode_cube_state(demo_cubix_tube().cube)):
+        print("Test failed: the demo configuration was not rejected.")
+        return
+    print("Test passed: no random walk state was rejected, and the demo configuration was.")
+
+
+def test_solution_cache(goal_cubix_tube, max_depth=5, seed=0):
+    """
+    Check SolutionCache on a symmetric goal: after one solve, the symmetric images of the
+    start and of every state along the path hit the cache, with paths conjugated back that
+    reach the goal, and so do they after the dbm file is reopened.
+
+    Args:
+        goal_cubix_tube: The CubixTube the symmetric goal is made from.
+        max_depth: One scramble of each depth from 1 to max_depth is solved.
+        seed: Seed for seeded_scrambles.
+    """
+    import tempfile
+
+    moves = FACE_MOVES
+    goal_state, symmetries = symmetric_goal(encode_cube_state(goal_cubix_tube.cube), puzzle_symmetries(moves))
+
+    def answers_images(cache, starts):
+        # every image of every state along each solution has to come back as a valid suffix
+        for start_state, solution in starts:
+            state = start_state
+            for position in range(len(solution) + 1):
+                for symmetry in symmetries:
+                    image = symmetry.apply(state)
+                    cached = cache.lookup(image)
+                    if cached is None or cached[1] != len(solution) - position or \
+                            CubeState(image).apply_moves(cached[0]) != goal_state:
+                        print(f"Test failed: the cache answered {cached} for an image under {symmetry.name}.")
+                        return False
+                if position < len(solution):
+                    state = move_tables()[solution[position]].apply(state)
+        return True
+
+    scrambles = seeded_scrambles(decode_to_cubix_tube(goal_state), moves, max_depth, seed)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "solutions")
+        starts = []
+        with SolutionCache(goal_state, moves, path, symmetries=symmetries) as cache:
+            for _, start_cube in scrambles:
+                starts.append((encode_cube_state(start_cube.cube), cache.solve(bidirectional_search, start_cube, moves=moves)))
+            if not answers_images(cache, starts):
+                return
+        with SolutionCache(goal_state, moves, path, symmetries=symmetries) as cache:
+            if not answers_images(cache, starts):
+                return
+            if cache.stats()["disk_hits"] == 0:
+                print("Test failed: nothing came from the reopened dbm file.")
+                return
+    print(f"Test passed for {len(scrambles)} scrambles under {len(symmetries)} goal symmetries.")
+
+
+def test_pattern_databases(goal_cubix_tube, max_depth=6, build_depth=5, seed=0):
+    """
+    Check the red layer pattern databases: a NumPy build matches a scalar build layer for
+    layer, and no lookup exceeds the optimal distance bidirectional_search finds.
+
+    Args:
+        goal_cubix_tube: The goal the databases measure distances to.
+        max_depth: Admissibility is checked on one scramble of each depth from 1 to max_depth.
+        build_depth: Depth both builds are compared to; the full build is slow without NumPy.
+        seed: Seed for seeded_scrambles.
+    """
+    global np, _NUMPY_CHECKED
+
+    moves = FACE_MOVES
+    goal_state = encode_cube_state(goal_cubix_tube.cube)
+    if _numpy_available():
+        for database in red_layer_pattern_databases(goal_state, moves):
+            batched = bytes(database.build(max_depth=build_depth)._table)
+            saved_numpy = np
+            np = None
+            try:
+                scalar = bytes(database.build(max_depth=build_depth)._table)
+            finally:
+                np = saved_numpy
+            if batched != scalar:
+                print(f"Test failed for {database.name}. The NumPy and scalar builds differ.")
+                return
+    else:
+        print("NumPy is not installed; skipping the batched build comparison.")
+
+    databases = open_pattern_databases(red_layer_pattern_databases(goal_state, moves)).databases
+    goal_state_serialized = serialize_encoded_state(goal_state)
+    scrambles = seeded_scrambles(goal_cubix_tube, moves, max_depth, seed)
+    for _, start_cube in scrambles:
+        start_state = encode_cube_state(start_cube.cube)
+        distance = len(bidirectional_search(start_cube, goal_state_serialized, moves))
+        for database in databases:
+            if database.lookup(start_state) > distance:
+                print(f"Test failed for {database.name}. It scores {database.lookup(start_state)} "
+                      f"for a state {distance} moves from the goal.")
+                return
+    print(f"Test passed for {len(databases)} pattern databases on {len(scrambles)} scrambles.")
+
+
+def test_symmetry_reduction(goal_cubix_tube, max_depth=4, seed=0):
+    """
+    Check that A* with the goal symmetries of a symmetric goal (see symmetric_goal) still
+    finds shortest paths; with ZERO_HEURISTIC it is breadth-first over one state per class.
+    """
+    goal_state, symmetries = symmetric_goal(encode_cube_state(goal_cubix_tube.cube), puzzle_symmetries(FACE_MOVES))
+    return _check_optimal_paths(
+        f"a_star_search_alpha under {len(symmetries)} goal symmetries",
+        lambda *args: a_star_search_alpha(*args, heuristic=ZERO_HEURISTIC, symmetries=symmetries),
+        decode_to_cubix_tube(goal_state), max_depth=max_depth, seed=seed,
+    )
+
+
+def benchmark_expansion(start_cube, goal_cubix_tube, num_states=200, seed=0):
+    """
+    Report A* expansions per second for the old string round trip and the compact expansion.
+
+    Both expand the same states with a_star_search_alpha's 18 moves.  The legacy path parses
+    the node with simplified_to_cubix_tube, uses apply_move per child and parses every child
+    again for calculate_heuristic.  The compact path applies compiled moves to the encoded
+    state and scores children with the per-slot tables.
+
+    Returns:
+        A tuple of (legacy expansions per second, compact expansions per second).
+    """
+    moves = FACE_MOVES
+    compiled_moves = [move_tables()[move_name] for move_name in moves]
+    goal_state = encode_cube_state(goal_cubix_tube.cube)
+    heuristic = derive_slot_heuristic(goal_state, calculate_heuristic)
+
+    rng = random.Random(seed)
+    states = [encode_cube_state(start_cube.cube)]
+    while len(states) < num_states:
+        states.append(rng.choice(compiled_moves).apply(states[-1]))
+
+    serialized_states = [serialize_encoded_state(state) for state in states]
+    started = time.perf_counter()
+    for serialized in serialized_states:
+        temp_cube = simplified_to_cubix_tube(serialized)
+        for move_name in moves:
+            new_cubix_tube = simplified_to_cubix_tube(apply_move(temp_cube, move_name))
+            calculate_heuristic(new_cubix_tube.cube, goal_cubix_tube.cube)
+    legacy_rate = num_states / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for state in states:
+        for move in compiled_moves:
+            heuristic.score(move.apply(state))
+    compact_rate = num_states / (time.perf_counter() - started)
+
+    print(f"Legacy expansion:  {legacy_rate:.0f} expansions/s")
+    print(f"Compact expansion: {compact_rate:.0f} expansions/s ({compact_rate / legacy_rate:.1f}x)")
+    return legacy_rate, compact_rate
+
+
+def _rate(operation, items, repeat=3):
+    # best of repeat passes over items, in operations per second
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            operation(item)
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best:
+            best = elapsed
+    return len(items) / best if best > 0 else float('inf')
+
+
+def seeded_scrambles(goal_cubix_tube, moves, max_depth, seed=0):
+    """
+    Scrambles of depth 1..max_depth made with apply_moves_random, reproducible from the seed.
+
+    Returns:
+        A list of (depth, CubixTube) tuples.
+    """
+    # a generator per depth, so the caller's random module state is left alone
+    scrambles = []
+    for depth in range(1, max_depth + 1):
+        scrambled = decode_to_cubix_tube(encode_cube_state(goal_cubix_tube.cube))
+        apply_moves_random(scrambled, moves, depth, random.Random(f"{seed}-{depth}"))
+        scrambles.append((depth, scrambled))
+    return scrambles
+
+
+def run_benchmarks(goal_cubix_tube, output_path=None, max_depth=4, solve_max_depth=2, seed=0, iterations=2000):
+    """
+    Benchmark move throughput, (de)serialization, heuristic cost and end-to-end solves.
+
+    Every input comes from seeded scrambles, so runs on different commits measure the same
+    work.  Solves are only run up to solve_max_depth since the searches grow quickly.
+
+    Args:
+        goal_cubix_tube: The solved CubixTube that scrambles start from and solves return to.
+        output_path: Where to write the results as JSON; nothing is written if None.
+        max_depth: Deepest scramble used for the throughput measurements.
+        solve_max_depth: Deepest scramble handed to a_star_search and a_star_search_alpha.
+        seed: Seed for the scrambles.
+        iterations: Operations per throughput measurement.
+
+    Returns:
+        The results as a dict.
+    """
+    import json
+    import platform
+    import subprocess
+    import tracemalloc
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    results = {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "seed": seed,
+        "max_depth": max_depth,
+        "iterations": iterations,
+    }
+
+    goal_state = encode_cube_state(goal_cubix_tube.cube)
+    goal_serialized = serialize_cube_state(goal_cubix_tube.cube)
+    scrambles = seeded_scrambles(goal_cubix_tube, list(move_pairs), max_depth, seed)
+    cubes = [cubix_tube for _, cubix_tube in scrambles]
+    # the same scrambles repeated out to iterations, in each representation
+    cubes = [cubes[i % len(cubes)] for i in range(iterations)]
+    states = [encode_cube_state(cubix_tube.cube) for cubix_tube in cubes]
+    serialized = [serialize_encoded_state(state) for state in states]
+
+    moves_per_second = {}
+    compiled_moves_per_second = {}
+    working_cube = decode_to_cubix_tube(states[-1])
+    for move_name in move_pairs:
+        move_method = getattr(working_cube, move_name)
+        moves_per_second[move_name] = _rate(lambda _: move_method(), range(iterations))
+        compiled_move = move_tables()[move_name]
+        compiled_moves_per_second[move_name] = _rate(compiled_move.apply, states)
+    results["moves_per_second"] = moves_per_second
+    results["compiled_moves_per_second"] = compiled_moves_per_second
+
+    results["serialization_per_second"] = {
+        "serialize_cube_state": _rate(lambda cubix_tube: serialize_cube_state(cubix_tube.cube), cubes),
+        "simplified_to_cubix_tube": _rate(simplified_to_cubix_tube, serialized),
+        "encode_cube_state": _rate(lambda cubix_tube: encode_cube_state(cubix_tube.cube), cubes),
+        "decode_cube_state": _rate(decode_cube_state, states),
+        "encode_serialized_state": _rate(encode_serialized_state, serialized),
+        "serialize_encoded_state": _rate(serialize_encoded_state, states),
+    }
+
+    full_slot_heuristic = derive_slot_heuristic(goal_state, calculate_heuristic)
+    alpha_slot_heuristic = derive_slot_heuristic(goal_state, calculate_heuristic_alpha, orientation_matrix)
+    results["heuristic_evaluations_per_second"] = {
+        "calculate_heuristic": _rate(lambda cubix_tube: calculate_heuristic(cubix_tube.cube, goal_cubix_tube.cube), cubes),
+        "calculate_heuristic_alpha": _rate(
+            lambda cubix_tube: calculate_heuristic_alpha(cubix_tube.cube, goal_cubix_tube.cube, orientation_matrix), cubes),
+        "slot_heuristic": _rate(full_slot_heuristic.score, states),
+        "slot_heuristic_alpha": _rate(alpha_slot_heuristic.score, states),
+    }
+
+    solves = []
+    for search, moves in ((a_star_search, SLICE_MOVES), (a_star_search_alpha, FACE_MOVES)):
+        for depth, scrambled in seeded_scrambles(goal_cubix_tube, moves, solve_max_depth, seed):
+            monitor = SearchMonitor(interval=None)
+            started = time.perf_counter()
+            path = search(scrambled, goal_serialized, goal_cubix_tube, monitor=monitor)
+            elapsed = time.perf_counter() - started
+            # a second, traced run for memory so tracing doesn't skew the timing
+            tracemalloc.start()
+            search(scrambled, goal_serialized, goal_cubix_tube)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            solves.append({
+                "search": search.__name__,
+                "depth": depth,
+                "seconds": elapsed,
+                "peak_memory_bytes": peak_memory,
+                "expansions": monitor.expansions,
+                "path_length": None if path is None else len(path),
+            })
+    results["solves"] = solves
+
+    if output_path is not None:
+        with open(output_path, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    return results
+
+
+
+# hash-distributed A*:
+# Every state has an owner, crc32(state) % workers; the owner keeps its open set, its
+# g scores and its came_from links.  Children for other workers are batched and
+# sent over their inbox queue.  Workers keep expanding after the first goal,
+# pruning anything with f >= the best goal cost so far (the incumbent), so the
+# result is optimal when the heuristic is admissible.  The search is over when
+# every worker is idle and every batch sent has been received.
+HDA_EXPANSION_CHUNK = 64
+HDA_REPLY_TIMEOUT = 1.0  # seconds between liveness checks while waiting on a trace reply
+
+
+def _hda_owner(state, workers):
+    return zlib.crc32(state) % workers
+
+
+def _hda_check_workers(processes):
+    # workers only exit when told to stop, so one that is gone died mid-search
+    for index, process in enumerate(processes):
+        if not process.is_alive():
+            raise RuntimeError(f"HDA* worker {index} died with exit code {process.exitcode}")
+
+
+def _hda_worker(index, workers, inboxes, replies, start_state, goal_state, compiled_moves, heuristic,
+                sent, received, idle, incumbent):
+    import queue
+
+    inbox = inboxes[index]
+    open_set = []
+    g_score = {}
+    came_from = {}  # state -> (parent state, move name)
+    outgoing = [[] for _ in range(workers)]
+
+    def insert(state, g, parent, move_name):
+        if g < g_score.get(state, float('inf')):
+            g_score[state] = g
+            came_from[state] = (parent, move_name)
+            heapq.heappush(open_set, (g + heuristic.score(state), g, state))
+
+    if _hda_owner(start_state, workers) == index:
+        insert(start_state, 0, None, None)
+
+    while True:
+        # block only when there is nothing left worth expanding
+        waiting = not open_set or open_set[0][0] >= incumbent.value
+        if waiting:
+            idle[index] = 1
+        try:
+            message = inbox.get(timeout=0.01) if waiting else inbox.get_nowait()
+        except queue.Empty:
+            message = None
+        while message is not None:
+            if message[0] == "nodes":
+                idle[index] = 0
+                for node in message[1]:
+                    insert(*node)
+                with received.get_lock():
+                    received.value += 1
+            elif message[0] == "trace":
+                replies.put(came_from.get(message[1]))
+            elif message[0] == "stop":
+                return
+            try:
+                message = inbox.get_nowait()
+            except queue.Empty:
+                message = None
+
+        expanded = 0
+        while open_set and expanded < HDA_EXPANSION_CHUNK:
+            f, g, state = heapq.heappop(open_set)
+            if f >= incumbent.value:
+                # the heap is ordered by f, so nothing left here can beat the incumbent
+                open_set = []
+                break
+            if g > g_score[state]:
+                continue
+            if state == goal_state:
+                with incumbent.get_lock():
+                    if g < incumbent.value:
+                        incumbent.value = g
+                continue
+            idle[index] = 0
+            expanded += 1
+            for move in compiled_moves:
+                new_state = move.apply(state)
+                owner = _hda_owner(new_state, workers)
+                if owner == index:
+                    insert(new_state, g + 1, state, move.name)
+                else:
+                    outgoing[owner].append((new_state, g + 1, state, move.name))
+
+        for owner, nodes in enumerate(outgoing):
+            if nodes:
+                # counted before sending, so a batch in flight always shows as sent > received
+                with sent.get_lock():
+                    sent.value += 1
+                inboxes[owner].put(("nodes", nodes))
+                outgoing[owner] = []
+
+
+def hda_star_search(start_cube, goal_state_serialized, goal_cubix_tube, workers=2, moves=None, heuristic=None):
+    """
+    Parallel A* for a single instance, with states partitioned across worker processes by hash.
+
+    Args:
+        start_cube: An instance of CubixTube representing the starting state.
+        goal_state_serialized: A serialized string representing the goal state.
+        goal_cubix_tube: The goal as a CubixTube, used for the default heuristic.
+        workers: Number of worker processes.
+        moves: Move names to search with; defaults to FACE_MOVES.
+        heuristic: Optional heuristic with a score(state) method.  Defaults to the red layer
+            pattern databases; the path is optimal if it is admissible.
+
+    Returns:
+        A list of moves from the start state to the goal state, or None.  Raises
+        RuntimeError if a worker process dies, e.g. of a MemoryError.
+    """
+    import multiprocessing
+    import queue
+
+    if moves is None:
+        moves = FACE_MOVES
+    start_state = encode_cube_state(start_cube.cube)
+    goal_state = encode_serialized_state(goal_state_serialized)
+    if not solvability_check(goal_state, moves).is_solvable(start_state):
+        return None
+    if heuristic is None:
+        heuristic = open_pattern_databases(red_layer_pattern_databases(encode_cube_state(goal_cubix_tube.cube), moves))
+    compiled_moves = [move_tables()[move_name] for move_name in moves]
+
+    # forked workers share the move tables and heuristic with this process
+    context = multiprocessing.get_context("fork")
+    inboxes = [context.Queue() for _ in range(workers)]
+    replies = context.Queue()
+    sent = context.Value('q', 0)
+    received = context.Value('q', 0)
+    idle = context.Array('b', workers)
+    incumbent = context.Value('d', float('inf'))
+    processes = [
+        context.Process(target=_hda_worker, args=(index, workers, inboxes, replies, start_state, goal_state,
+                                                  compiled_moves, heuristic, sent, received, idle, incumbent))
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        while True:
+            time.sleep(0.005)
+            # a dead worker never goes idle, so without this the loop would spin forever
+            _hda_check_workers(processes)
+            counts = (sent.value, received.value)
+            # read the counters on both sides of the idle flags: if they agree and match,
+            # no batch was in flight while every worker was idle
+            if counts[0] == counts[1] and all(idle) and (sent.value, received.value) == counts:
+                break
+
+        path = None
+        if incumbent.value != float('inf'):
+            path = []
+            state = goal_state
+            while state != start_state:
+                inboxes[_hda_owner(state, workers)].put(("trace", state))
+                while True:
+                    try:
+                        state, move_name = replies.get(timeout=HDA_REPLY_TIMEOUT)
+                        break
+                    except queue.Empty:
+                        _hda_check_workers(processes)
+                path.append(move_name)
+            path.reverse()
+    except BaseException:
+        # the survivors may be blocked on the dead worker's queue, so they are not waited for
+        for process in processes:
+            process.terminate()
+        raise
+    finally:
+        for inbox in inboxes:
+            inbox.put(("stop",))
+        for process in processes:
+            process.join()
+    return path
+
+
+def hda_speedup_report(start_cube, goal_state_serialized, goal_cubix_tube, max_workers=4, moves=None, heuristic=None):
+    """
+    Time hda_star_search with 1..max_workers workers against the single-process a_star_core
+    loop that a_star_search runs, on the same moves and heuristic.
+
+    Returns:
+        A list of dicts with workers (0 for the single-process search), seconds, speedup and path_length.
+    """
+    if moves is None:
+        moves = FACE_MOVES
+    if heuristic is None:
+        heuristic = open_pattern_databases(red_layer_pattern_databases(encode_cube_state(goal_cubix_tube.cube), moves))
+
+    started = time.perf_counter()
+    path = a_star_core(encode_cube_state(start_cube.cube), encode_serialized_state(goal_state_serialized), moves, heuristic)
+    baseline = time.perf_counter() - started
+    report = [{"workers": 0, "seconds": baseline, "speedup": 1.0, "path_length": None if path is None else len(path)}]
+    for workers in range(1, max_workers + 1):
+        started = time.perf_counter()
+        path = hda_star_search(start_cube, goal_state_serialized, goal_cubix_tube, workers, moves, heuristic)
+        elapsed = time.perf_counter() - started
+        report.append({"workers": workers, "seconds": elapsed, "speedup": baseline / elapsed,
+                       "path_length": None if path is None else len(path)})
+    for row in report:
+        print(f"{row['workers']} workers: {row['seconds']:.2f}s ({row['speedup']:.2f}x), path length {row['path_length']}")
+    return report
+
+
+# external-memory search:
+# Layers of states live on disk as sorted files of PACKED_STATE_SIZE records.  A new
+# layer is generated into sorted runs no larger than the RAM budget, merged, and
+# stripped of states already in earlier layers by streaming against their files
+# (delayed duplicate detection).  When the move set contains every inverse, a state
+# at depth d+1 can only reappear in layers d and d-1, so only those are checked.
+EXTERNAL_RECORD_BYTES = 100  # rough RAM per buffered state: the bytes object plus its list slot
+EXTERNAL_READ_RECORDS = 4096
+
+
+def _read_packed(path):
+    with open(path, "rb") as packed_file:
+        while True:
+            chunk = packed_file.read(PACKED_STATE_SIZE * EXTERNAL_READ_RECORDS)
+            if not chunk:
+                return
+            for offset in range(0, len(chunk), PACKED_STATE_SIZE):
+                yield chunk[offset:offset + PACKED_STATE_SIZE]
+
+
+def _write_packed(path, records):
+    count = 0
+    with open(path, "wb") as packed_file:
+        for record in records:
+            packed_file.write(record)
+            count += 1
+    return count
+
+
+def _sorted_runs(records, directory, prefix, capacity):
+    # cut the stream into sorted, duplicate free run files of at most capacity records
+    runs = []
+    buffer = set()
+    for record in records:
+        buffer.add(record)
+        if len(buffer) >= capacity:
+            runs.append(os.path.join(directory, f"{prefix}.run{len(runs)}"))
+            _write_packed(runs[-1], sorted(buffer))
+            buffer = set()
+    if buffer or not runs:
+        runs.append(os.path.join(directory, f"{prefix}.run{len(runs)}"))
+        _write_packed(runs[-1], sorted(buffer))
+    return runs
+
+
+def _merge_unique(paths):
+    previous = None
+    for record in heapq.merge(*(_read_packed(path) for path in paths)):
+        if record != previous:
+            yield record
+            previous = record
+
+
+def _subtract_sorted(records, paths):
+    # records and every file are sorted, so each file is read once alongside the stream
+    readers = [_read_packed(path) for path in paths if os.path.exists(path)]
+    heads = [next(reader, None) for reader in readers]
+    for record in records:
+        seen = False
+        for i, reader in enumerate(readers):
+            while heads[i] is not None and heads[i] < record:
+                heads[i] = next(reader, None)
+            if heads[i] == record:
+                seen = True
+        if not seen:
+            yield record
+
+
+def _contains_packed(path, record):
+    # binary search over the fixed size records of a sorted file
+    if not os.path.exists(path):
+        return False
+    with open(path, "rb") as packed_file:
+        low, high = 0, os.path.getsize(path) // PACKED_STATE_SIZE
+        while low < high:
+            middle = (low + high) // 2
+            packed_file.seek(middle * PACKED_STATE_SIZE)
+            current = packed_file.read(PACKED_STATE_SIZE)
+            if current < record:
+                low = middle + 1
+            elif current > record:
+                high = middle
+            else:
+                return True
+    return False
+
+
+def _external_layer(records, directory, name, capacity, previous_paths):
+    # sort, merge and strip a stream of new records into directory/name; returns the count
+    runs = _sorted_runs(records, directory, name, capacity)
+    path = os.path.join(directory, name)
+    count = _write_packed(path + ".tmp", _subtract_sorted(_merge_unique(runs), previous_paths))
+    os.replace(path + ".tmp", path)
+    for run in runs:
+        os.remove(run)
+    return count
+
+
+def _closed_under_inverses(moves):
+    return all(move_pairs[move_name][1] in moves for move_name in moves)
+
+
+def external_bfs(directory, start_cube=None, moves=None, ram_budget=256 * 1024 * 1024, max_depth=None, verbose=False):
+    """
+    Breadth-first distance enumeration with the layers kept on disk as directory/layer-<d>.bin.
+
+    Args:
+        directory: Where to write the layer files.
+        start_cube: The CubixTube to start from; defaults to the solved state.
+        moves: Move names to search with; defaults to FACE_MOVES.
+        ram_budget: Bytes of states held in memory at once while sorting a layer.
+        max_depth: Deepest layer to generate, or None to run until the space is exhausted.
+        verbose: Print each layer size as it is written.
+
+    Returns:
+        The number of states at each distance, starting with the start state at distance 0.
+    """
+    if moves is None:
+        moves = FACE_MOVES
+    if start_cube is None:
+        start_cube = solved_cubix_tube()
+    compiled_moves = [move_tables()[move_name] for move_name in moves]
+    capacity = max(1, ram_budget // EXTERNAL_RECORD_BYTES)
+    keep_all = not _closed_under_inverses(moves)
+    os.makedirs(directory, exist_ok=True)
+
+    def layer_path(depth):
+        return os.path.join(directory, f"layer-{depth}.bin")
+
+    _write_packed(layer_path(0), [pack_state(encode_cube_state(start_cube.cube))])
+    sizes = [1]
+    depth = 0
+    while sizes[-1] and (max_depth is None or depth < max_depth):
+        children = (
+            pack_state(move.apply(state))
+            for state in map(unpack_state, _read_packed(layer_path(depth)))
+            for move in compiled_moves
+        )
+        previous = [layer_path(d) for d in range(depth + 1)] if keep_all else [layer_path(depth), layer_path(depth - 1)]
+        depth += 1
+        sizes.append(_external_layer(children, directory, f"layer-{depth}.bin", capacity, previous))
+        if verbose:
+            print(f"depth {depth}: {sizes[-1]} states")
+    if not sizes[-1]:
+        sizes.pop()
+        os.remove(layer_path(depth))
+    return sizes
+
+
+def external_a_star_search(start_cube, goal_state_serialized, goal_cubix_tube, directory, moves=None, heuristic=None,
+                           ram_budget=256 * 1024 * 1024, max_depth=30):
+    """
+    Frontier-layered A* with every (g, h) bucket of states kept on disk.
+
+    Buckets are expanded in order of f = g + h, then g.  Children are appended to the raw
+    file of their bucket, and a bucket is sorted and stripped of duplicates only when it is
+    expanded: a state always lands in the same h, so only the buckets (g, h), (g - 1, h) and
+    (g - 2, h) can hold it, or every g with that h if the moves lack some inverse.  The path
+    is recovered afterwards by stepping back from the goal with inverse moves and binary
+    searching each predecessor in its bucket file.
+
+    Args:
+        start_cube: An instance of CubixTube representing the starting state.
+        goal_state_serialized: A serialized string representing the goal state.
+        goal_cubix_tube: The goal as a CubixTube, used for the default heuristic.
+        directory: Where to keep the bucket files.
+        moves: Move names to search with; defaults to FACE_MOVES.
+        heuristic: Optional heuristic with a score(state) method.  Defaults to the red layer
+            pattern databases.
+        ram_budget: Bytes of states held in memory at once while buffering or sorting.
+        max_depth: Buckets deeper than this are not expanded.
+
+    Returns:
+        A list of moves from the start state to the goal state, or None.
+    """
+    if moves is None:
+        moves = FACE_MOVES
+    start_state = encode_cube_state(start_cube.cube)
+    goal_state = encode_serialized_state(goal_state_serialized)
+    if not solvability_check(goal_state, moves).is_solvable(start_state):
+        return None
+    if heuristic is None:
+        heuristic = open_pattern_databases(red_layer_pattern_databases(encode_cube_state(goal_cubix_tube.cube), moves))
+    tables = move_tables()
+    compiled_moves = [tables[move_name] for move_name in moves]
+    capacity = max(1, ram_budget // EXTERNAL_RECORD_BYTES)
+    keep_all = not _closed_under_inverses(moves)
+    os.makedirs(directory, exist_ok=True)
+    goal_record = pack_state(goal_state)
+
+    def bucket_path(g, h, suffix=".bin"):
+        return os.path.join(directory, f"bucket-{g}-{h}{suffix}")
+
+    # children waiting to be appended to their bucket's raw file
+    buffers = {}
+    buffered = 0
+
+    def flush():
+        nonlocal buffered
+        for (g, h), records in buffers.items():
+            with open(bucket_path(g, h, ".raw"), "ab") as raw_file:
+                raw_file.write(b''.join(records))
+        buffers.clear()
+        buffered = 0
+
+    pending = {(0, heuristic.score(start_state))}
+    buffers[(0, heuristic.score(start_state))] = [pack_state(start_state)]
+    flush()
+    expanded = set()
+    goal_depth = None
+    while pending:
+        g, h = min(pending, key=lambda bucket: (bucket[0] + bucket[1], bucket[0]))
+        pending.discard((g, h))
+        flush()
+
+        # earlier states of this bucket, if it is being reopened, count as seen as well
+        previous = [bucket_path(d, h) for d in range(g + 1)] if keep_all else [bucket_path(g, h), bucket_path(g - 1, h), bucket_path(g - 2, h)]
+        new_name = f"bucket-{g}-{h}.new"
+        raw_path = bucket_path(g, h, ".raw")
+        count = _external_layer(_read_packed(raw_path), directory, new_name, capacity, previous)
+        os.remove(raw_path)
+        new_path = os.path.join(directory, new_name)
+        if count:
+            if (g, h) in expanded:
+                _write_packed(bucket_path(g, h, ".tmp"), _merge_unique([bucket_path(g, h), new_path]))
+                os.replace(bucket_path(g, h, ".tmp"), bucket_path(g, h))
+            else:
+                os.replace(new_path, bucket_path(g, h))
+                new_path = bucket_path(g, h)
+            expanded.add((g, h))
+
+            if h == 0 and _contains_packed(new_path, goal_record):
+                goal_depth = g
+                if new_path != bucket_path(g, h):
+                    os.remove(new_path)
+                break
+            if g < max_depth:
+                for state in map(unpack_state, _read_packed(new_path)):
+                    for move in compiled_moves:
+                        new_state = move.apply(state)
+                        key = (g + 1, heuristic.score(new_state))
+                        buffers.setdefault(key, []).append(pack_state(new_state))
+                        pending.add(key)
+                        buffered += 1
+                        if buffered >= capacity:
+                            flush()
+        if new_path != bucket_path(g, h):
+            os.remove(new_path)
+    flush()
+
+    if goal_depth is None:
+        return None
+    # step back one depth at a time: some move's inverse leads to a stored predecessor
+    path = []
+    state = goal_state
+    for g in range(goal_depth - 1, -1, -1):
+        for move_name in moves:
+            parent = tables[move_pairs[move_name][1]].apply(state)
+            if _contains_packed(bucket_path(g, heuristic.score(parent)), pack_state(parent)):
+                path.append(move_name)
+                state = parent
+                break
+    path.reverse()
+    return path
+
+
+# batch solving:
+# The parent builds the move tables and opens the pattern databases before the pool
+# forks, so the workers share them copy-on-write (the databases are memory mapped)
+# and each task only pickles an index and a serialized start state.
+BATCH_SOLVERS = ("a_star_search", "a_star_search_alpha", "ida_star_search", "bidirectional_search")
+# the move set each solver searches with, which its pattern databases must be built over
+BATCH_SOLVER_MOVES = {
+    "a_star_search": SLICE_MOVES,
+    "a_star_search_alpha": FACE_MOVES,
+    "ida_star_search": FACE_MOVES,
+    "bidirectional_search": FACE_MOVES,
+}
+_BATCH_CONTEXT = None
+
+
+class SolveTimeout(Exception):
+    pass
+
+
+def solved_cubix_tube():
+    """
+    A fresh CubixTube in the solved configuration.
+    """
+    cubix_tube = CubixTube()
+    initialize_front_face_solved(cubix_tube)
+    initialize_middle_layer_solved(cubix_tube)
+    initialize_back_face_solved(cubix_tube)
+    return cubix_tube
+
+
+def _raise_solve_timeout(signum, frame):
+    raise SolveTimeout()
+
+
+def _batch_worker_init(memory_limit):
+    import signal
+
+    if memory_limit is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    signal.signal(signal.SIGALRM, _raise_solve_timeout)
+
+
+def _solve_batch_job(index, start_serialized):
+    import signal
+
+    solver, goal_state_serialized, goal_cubix_tube, heuristic, timeout = _BATCH_CONTEXT
+    result = {"index": index, "start": start_serialized, "solver": solver}
+    started = time.perf_counter()
+    if timeout is not None:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        start_cube = decode_to_cubix_tube(encode_serialized_state(start_serialized))
+        if solver == "bidirectional_search":
+            path = bidirectional_search(start_cube, goal_state_serialized)
+        else:
+            path = globals()[solver](start_cube, goal_state_serialized, goal_cubix_tube, heuristic=heuristic)
+        result.update(status="solved" if path is not None else "unsolved", path=path)
+    except SolveTimeout:
+        result["status"] = "timeout"
+    except MemoryError:
+        result["status"] = "memory"
+    except ValueError as error:
+        result.update(status="invalid", error=str(error))
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def solve_batch(start_states_serialized, goal_state_serialized=None, solver="a_star_search", workers=None,
+                timeout=None, memory_limit=None, pattern_database_directory=None):
+    """
+    Solve many start states across a pool of worker processes.
+
+    Args:
+        start_states_serialized: Start states in the serialize_cube_state format.
+        goal_state_serialized: The goal in the same format; defaults to the solved state.
+        solver: One of BATCH_SOLVERS.
+        workers: Number of worker processes; defaults to the CPU count.
+        timeout: Seconds allowed per start state, or None for no limit.
+        memory_limit: Address space limit per worker in bytes, or None for no limit.
+        pattern_database_directory: If given, the red layer pattern databases for the solver's
+            moves are built or loaded there and used as the heuristic.  ida_star_search builds
+            them in memory otherwise; bidirectional_search uses no heuristic.
+
+    Yields:
+        A dict per start state, in completion order, with its index, status
+        ("solved", "unsolved", "timeout", "memory" or "invalid"), path and seconds.
+    """
+    import concurrent.futures
+    import multiprocessing
+
+    global _BATCH_CONTEXT
+    if solver not in BATCH_SOLVERS:
+        raise ValueError(f"Unknown solver {solver!r}, expected one of {', '.join(BATCH_SOLVERS)}.")
+    if goal_state_serialized is None:
+        goal_cubix_tube = solved_cubix_tube()
+        goal_state_serialized = serialize_cube_state(goal_cubix_tube.cube)
+    else:
+        goal_cubix_tube = decode_to_cubix_tube(encode_serialized_state(goal_state_serialized))
+
+    # everything shared is built before the fork, so the workers inherit it
+    move_tables()
+    heuristic = None
+    goal_state = encode_cube_state(goal_cubix_tube.cube)
+    moves = BATCH_SOLVER_MOVES[solver]
+    solvability_check(goal_state, moves)
+    if solver != "bidirectional_search" and (pattern_database_directory is not None or solver == "ida_star_search"):
+        # distances under any other move set are no lower bound for the solver's moves
+        heuristic = open_pattern_databases(red_layer_pattern_databases(goal_state, moves), pattern_database_directory)
+    _BATCH_CONTEXT = (solver, goal_state_serialized, goal_cubix_tube, heuristic, timeout)
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("fork"),
+        initializer=_batch_worker_init, initargs=(memory_limit,),
+    ) as executor:
+        futures = [
+            executor.submit(_solve_batch_job, index, start_serialized)
+            for index, start_serialized in enumerate(start_states_serialized)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def batch_main(argv=None):
+    """
+    Command line entry point: solve every state in a file and print JSON lines.
+    """
+    import argparse
+    import contextlib
+    import json
+
+    parser = argparse.ArgumentParser(prog="cubixtube.py batch", description=batch_main.__doc__.strip())
+    parser.add_argument("input", help="file of start states in the serialize_cube_state format, one per line")
+    parser.add_argument("--goal", help="goal state in the same format (default: the solved state)")
+    parser.add_argument("--solver", choices=BATCH_SOLVERS, default="a_star_search")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds per start state")
+    parser.add_argument("--memory-limit", type=float, default=None, help="megabytes of address space per worker")
+    parser.add_argument("--pattern-databases", default=None, help="directory of pattern databases to use as the heuristic")
+    parser.add_argument("--output", default=None, help="file for the JSON lines (default: stdout)")
+    args = parser.parse_args(argv)
+
+    with open(args.input) as input_file:
+        start_states = [line.strip() for line in input_file if line.strip()]
+    memory_limit = None if args.memory_limit is None else int(args.memory_limit * 1024 * 1024)
+    output = sys.stdout if args.output is None else open(args.output, "w")
+    try:
+        # stdout carries only the JSON lines; anything else the solvers print goes to stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            for result in solve_batch(start_states, args.goal, args.solver, args.workers, args.timeout,
+                                      memory_limit, args.pattern_databases):
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+def demo_cubix_tube():
+    """
+    The demo configuration set up by initialize_front_face and friends.
+    """
+    cubix_tube = CubixTube()
+    initialize_front_face(cubix_tube)
+    initialize_middle_layer(cubix_tube)
+    initialize_back_face(cubix_tube)
+    return cubix_tube
+
+
+def main(argv=None):
+    """
+    Command line entry point: solve, batch, bench or build-tables.
+    """
+    import argparse
+    import json
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["batch"]:
+        # batch has its own parser
+        return batch_main(argv[1:])
+    parser = argparse.ArgumentParser(prog="cubixtube.py", description=main.__doc__.strip())
+    commands = parser.add_subparsers(dest="command", required=True)
+    solve = commands.add_parser("solve", help="solve one state; with no states given, runs the demo")
+    solve.add_argument("--start", help="start state in the serialize_cube_state format (default: the solved state)")
+    solve.add_argument("--goal", help="goal state in the same format (default: the solved state)")
+    solve.add_argument("--solver", choices=BATCH_SOLVERS, default="a_star_search")
+    commands.add_parser("batch", help="solve every state in a file; see cubixtube.py batch --help", add_help=False)
+    bench = commands.add_parser("bench", help="run the seeded benchmarks and print the results as JSON")
+    bench.add_argument("--output", default=None, help="also write the results to this file")
+    bench.add_argument("--max-depth", type=int, default=4, help="deepest scramble for the throughput measurements")
+    bench.add_argument("--solve-max-depth", type=int, default=2, help="deepest scramble to solve")
+    bench.add_argument("--seed", type=int, default=0)
+    tables = commands.add_parser("build-tables", help="build or resume the pattern databases in a directory")
+    tables.add_argument("directory")
+    tables.add_argument("--goal", help="goal state in the serialize_cube_state format (default: the solved state)")
+    args = parser.parse_args(argv)
+
+    if args.command == "solve":
+        start_cube = solved_cubix_tube() if args.start is None else decode_to_cubix_tube(encode_serialized_state(args.start))
+        goal_cubix_tube = solved_cubix_tube() if args.goal is None else decode_to_cubix_tube(encode_serialized_state(args.goal))
+        if args.start is None and args.goal is None:
+            # the demo solves the other way: from the solved state to the demo configuration
+            goal_cubix_tube = demo_cubix_tube()
+        goal_state_serialized = serialize_cube_state(goal_cubix_tube.cube)
+        if args.solver == "bidirectional_search":
+            path = bidirectional_search(start_cube, goal_state_serialized)
+        else:
+            path = globals()[args.solver](start_cube, goal_state_serialized, goal_cubix_tube)
+        print(path)
+    elif args.command == "bench":
+        results = run_benchmarks(solved_cubix_tube(), args.output, args.max_depth, args.solve_max_depth, args.seed)
+        print(json.dumps(results, indent=2))
+    elif args.command == "build-tables":
+        goal_cubix_tube = solved_cubix_tube() if args.goal is None else decode_to_cubix_tube(encode_serialized_state(args.goal))
+        goal_state = encode_cube_state(goal_cubix_tube.cube)
+        move_tables()
+        for databases in (red_layer_pattern_databases(goal_state, FACE_MOVES), red_pattern_databases(goal_state, FACE_MOVES)):
+            open_pattern_databases(databases, args.directory, verbose=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
 
 
 # 1-4 up
@@ -1185,71 +5096,4 @@ print(path)
 # Implement Checkpoint Alpha: Red pieces.
 
 
-# import random
-
-
-
-# def a_star_search_with_randomness(start_cube, goal_state_serialized, goal_cubix_tube):
-#     """
-#     Perform A* search to find the shortest path to solve the Rubik's cube, with randomness injection to escape local minima.
-#     """
-#     open_set = [(0, 0, serialize_cube_state(start_cube))]
-#     heapq.heapify(open_set)
-
-#     # Maps for score tracking and path reconstruction
-#     g_score = {serialize_cube_state(start_cube): 0}
-#     came_from = {}
-#     closed_set = set()
-
-#     # Introduce randomness when progress stalls
-#     last_improvement_iteration = 0
-#     min_heuristic = float('inf')
-#     improvement_threshold = 20000  # Trigger random moves after 20,000 iterations without improvement
-
-#     # Moves
-#     moves = ['L', 'L_Prime', 'R', 'R_Prime', 'F', 'F_Prime', 'B', 'B_Prime', 'U', 'U_Prime', 'D', 'D_Prime']
-
-#     while open_set:
-#         _, current_g, current_serialized = heapq.heappop(open_set)
-#         current_cube = simplified_to_cubix_tube(current_serialized)
-
-#         # Goal check
-#         if current_serialized == goal_state_serialized:
-#             return reconstruct_path(came_from, current_serialized)
-
-#         closed_set.add(current_serialized)
-
-#         # Randomness injection if stuck
-#         if len(closed_set) - last_improvement_iteration >= improvement_threshold:
-#             random_move_num = random.randint(1, 10)
-#             applied_moves, serialized_cube_state = apply_random_moves(current_cube, random_move_num)
-#             new_serialized_after_random = serialize_cube_state(current_cube)
-#             if new_serialized_after_random not in closed_set:
-#                 # Only proceed if the random state is new
-#                 revert_random_moves(current_cube, applied_moves)  # Revert to the original state to continue with regular A* steps
-#                 last_improvement_iteration = len(closed_set)  # Reset the counter as we've attempted to escape the local minimum
-
-#         for move_name in moves:
-#             # Regular A* expansion with each move
-#             new_serialized = apply_move(current_cube, move_name)
-
-#             if new_serialized in closed_set:
-#                 continue  # Skip already visited states
-
-#             tentative_g_score = current_g + 1
-#             if new_serialized not in g_score or tentative_g_score < g_score[new_serialized]:
-#                 # New state or better path found
-#                 came_from[new_serialized] = current_serialized
-#                 g_score[new_serialized] = tentative_g_score
-#                 f_score = tentative_g_score + calculate_heuristic(current_cube, goal_cubix_tube)
-
-#                 if f_score < min_heuristic:
-#                     min_heuristic = f_score
-#                     last_improvement_iteration = len(closed_set)  # Update last improvement
-
-#                 heapq.heappush(open_set, (f_score, tentative_g_score, new_serialized))
-
-#     return None  # No solution found, or complete the function with appropriate return
-
-
 